@@ -5,20 +5,42 @@ Enhanced database operations with existence checks and configuration
 """
 
 import os
-import glob
+import copy
+import json
 import time
+import random
+import queue
 import logging
+import logging.handlers
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, List, Any, Optional
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import clickhouse_connect
+from clickhouse_connect.driver import httputil
+from clickhouse_connect.driver.exceptions import OperationalError
 from clickhouse_driver import Client
+from clickhouse_driver.errors import NetworkError, SocketTimeoutError, UnexpectedPacketFromServerError
 from dotenv import load_dotenv
 from tqdm import tqdm
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Setup logging
 def setup_logging():
     load_dotenv()
     level = logging.DEBUG if os.getenv('VERBOSE_LOGGING', 'true').lower() == 'true' else logging.INFO
     
+    log_format = '%(asctime)s - %(levelname)s - %(message)s'
+    
     # Create handlers list
     handlers = [logging.StreamHandler()]
     
@@ -27,44 +49,282 @@ def setup_logging():
         log_dir = os.getenv('LOG_DIRECTORY', '/tmp')
         os.makedirs(log_dir, exist_ok=True)
         log_file = os.path.join(log_dir, 'clickhouse.log')
-        handlers.append(logging.FileHandler(log_file))
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setFormatter(logging.Formatter(log_format))
+        # Buffer file writes during ingestion; errors still flush immediately
+        handlers.append(logging.handlers.MemoryHandler(
+            capacity=1024, flushLevel=logging.ERROR, target=file_handler
+        ))
     except Exception:
         # If file logging fails, continue with just console logging
         pass
     
     logging.basicConfig(
         level=level,
-        format='%(asctime)s - %(levelname)s - %(message)s',
+        format=log_format,
         handlers=handlers
     )
     return logging.getLogger(__name__)
 
 logger = setup_logging()
 
+# Connection-level failures worth retrying; anything else (schema mismatch,
+# bad data, permissions) fails the same way every time
+TRANSIENT_ERRORS = (NetworkError, SocketTimeoutError, UnexpectedPacketFromServerError, OperationalError)
+
+
+# PuppyGraph schema; connection details are added by create_graph_schema_file
+_SCHEMA_TEMPLATE = {
+    "catalogs": [
+        {
+            "name": "clickhouse",
+            "type": "clickhouse",
+            "jdbc": {
+                "url": None,
+                "username": None,
+                "password": None,
+                "driverClassName": "com.clickhouse.jdbc.ClickHouseDriver"
+            }
+        }
+    ],
+    "graph": {
+        "vertices": [
+            {
+                "label": "Customer",
+                "mappedTableSource": {
+                    "catalog": "clickhouse",
+                    "schema": "default",
+                    "table": "customers",
+                    "metaFields": {"id": "customer_id"}
+                },
+                "properties": {
+                    "email": {"column": "email", "type": "STRING"},
+                    "name": {"column": "name", "type": "STRING"},
+                    "segment": {"column": "segment", "type": "STRING"},
+                    "ltv": {"column": "ltv", "type": "DOUBLE"}
+                }
+            },
+            {
+                "label": "Product",
+                "mappedTableSource": {
+                    "catalog": "clickhouse",
+                    "schema": "default",
+                    "table": "products",
+                    "metaFields": {"id": "product_id"}
+                },
+                "properties": {
+                    "name": {"column": "name", "type": "STRING"},
+                    "category": {"column": "category", "type": "STRING"},
+                    "brand": {"column": "brand", "type": "STRING"},
+                    "price": {"column": "price", "type": "DOUBLE"}
+                }
+            }
+        ],
+        "edges": [
+            {
+                "label": "PURCHASED",
+                "mappedTableSource": {
+                    "catalog": "clickhouse",
+                    "schema": "default",
+                    "table": "transactions",
+                    "metaFields": {
+                        "id": "transaction_id",
+                        "from": "customer_id",
+                        "to": "product_id"
+                    },
+                    "predicate": "status = 'completed'"
+                },
+                "properties": {
+                    "amount": {"column": "amount", "type": "DOUBLE"},
+                    "timestamp": {"column": "timestamp", "type": "TIMESTAMP"},
+                    "channel": {"column": "channel", "type": "STRING"}
+                }
+            },
+            {
+                "label": "VIEWED",
+                "mappedTableSource": {
+                    "catalog": "clickhouse",
+                    "schema": "default",
+                    "table": "interactions",
+                    "metaFields": {
+                        "id": "interaction_id",
+                        "from": "customer_id",
+                        "to": "product_id"
+                    },
+                    "predicate": "type = 'view'"
+                },
+                "properties": {
+                    "timestamp": {"column": "timestamp", "type": "TIMESTAMP"},
+                    "duration": {"column": "duration", "type": "INTEGER"},
+                    "device": {"column": "device", "type": "STRING"}
+                }
+            }
+        ]
+    }
+}
+
+
+@lru_cache(maxsize=None)
+def _datetime_columns(columns: tuple) -> tuple:
+    """Columns that map to ClickHouse Date/DateTime, resolved once per column layout"""
+    return tuple(
+        col for col in columns
+        if 'timestamp' in col.lower() or 'date' in col.lower() or col == 'created_at'
+    )
+
+
+@dataclass(frozen=True)
+class CHConfig:
+    """ClickHouse connection and ingestion settings"""
+    host: Optional[str]
+    port: int
+    user: str
+    password: Optional[str]
+    database: str
+    secure: bool
+    compression: Any
+    client_type: str
+    http_port: int
+    connect_timeout: int
+    send_receive_timeout: int
+    batch_size: int
+    async_insert_threshold: int
+    async_insert_busy_timeout_ms: int
+    async_insert_max_data_size: int
+    create_db_if_not_exists: bool
+    enable_table_checks: bool
+    drop_existing: bool
+    truncate_before_load: bool
+    skip_existing: bool
+    retry_attempts: int
+    retry_delay: int
+    retry_max_delay: int
+    max_insert_block_size: int
+    min_insert_block_size_rows: int
+    optimize_after_load: bool
+    optimize_timeout: int
+    ingest_parallelism: int
+    pool_size: int
+    show_progress: bool
+    
+    @classmethod
+    def from_env(cls) -> 'CHConfig':
+        """Build settings from environment variables (.env is loaded at import)"""
+        secure = os.getenv('CLICKHOUSE_SECURE', 'true').lower() == 'true'
+        batch_size = int(os.getenv('INGESTION_BATCH_SIZE', 100000))
+        
+        # Native protocol block compression (lz4, lz4hc, zstd or none)
+        compression = os.getenv('CLICKHOUSE_COMPRESSION', 'lz4').lower()
+        
+        return cls(
+            host=os.getenv('CLICKHOUSE_HOST'),
+            port=int(os.getenv('CLICKHOUSE_PORT', 9440)),
+            user=os.getenv('CLICKHOUSE_USER', 'default'),
+            password=os.getenv('CLICKHOUSE_PASSWORD'),
+            database=os.getenv('CLICKHOUSE_DATABASE', 'customer360'),
+            secure=secure,
+            compression=False if compression in ('', 'none', 'false') else compression,
+            # Insert path: 'native' (clickhouse-driver), 'connect' (HTTP + Arrow)
+            # or 'parquet' (HTTP, raw file bytes parsed by the server)
+            client_type=os.getenv('CLICKHOUSE_CLIENT', 'native').lower(),
+            http_port=int(os.getenv('CLICKHOUSE_HTTP_PORT', 8443 if secure else 8123)),
+            connect_timeout=int(os.getenv('CLICKHOUSE_CONNECT_TIMEOUT', 10)),
+            send_receive_timeout=int(os.getenv('CLICKHOUSE_SEND_RECEIVE_TIMEOUT', 300)),
+            batch_size=batch_size,
+            async_insert_threshold=int(os.getenv('ASYNC_INSERT_THRESHOLD', batch_size // 4)),
+            async_insert_busy_timeout_ms=int(os.getenv('ASYNC_INSERT_BUSY_TIMEOUT_MS', 1000)),
+            async_insert_max_data_size=int(os.getenv('ASYNC_INSERT_MAX_DATA_SIZE', 10000000)),
+            create_db_if_not_exists=os.getenv('CREATE_DATABASE_IF_NOT_EXISTS', 'true').lower() == 'true',
+            enable_table_checks=os.getenv('CHECK_TABLE_EXISTS', 'true').lower() == 'true',
+            drop_existing=os.getenv('DROP_EXISTING_TABLES', 'false').lower() == 'true',
+            truncate_before_load=os.getenv('TRUNCATE_BEFORE_LOAD', 'false').lower() == 'true',
+            skip_existing=os.getenv('SKIP_EXISTING_TABLES', 'false').lower() == 'true',
+            retry_attempts=int(os.getenv('INGESTION_RETRY_ATTEMPTS', 3)),
+            retry_delay=int(os.getenv('INGESTION_RETRY_DELAY', 5)),
+            retry_max_delay=int(os.getenv('INGESTION_RETRY_MAX_DELAY', 60)),
+            max_insert_block_size=int(os.getenv('MAX_INSERT_BLOCK_SIZE', 1048576)),
+            min_insert_block_size_rows=int(os.getenv('MIN_INSERT_BLOCK_SIZE_ROWS', 1048576)),
+            optimize_after_load=os.getenv('OPTIMIZE_AFTER_LOAD', 'false').lower() == 'true',
+            optimize_timeout=int(os.getenv('OPTIMIZE_TIMEOUT', 3600)),
+            ingest_parallelism=int(os.getenv('INGEST_PARALLELISM', 4)),
+            pool_size=int(os.getenv('CONNECTION_POOL_SIZE', 10)),
+            show_progress=os.getenv('SHOW_PROGRESS_BARS', 'true').lower() == 'true'
+        )
+
 
 class ClickHouseClient:
     """Simple ClickHouse client for Customer 360 demo"""
     
-    def __init__(self):
-        """Initialize ClickHouse connection from environment variables"""
-        load_dotenv()
+    TABLES = [
+        'customers', 'products', 'transactions', 'interactions',
+        'fraud_customers', 'fraud_accounts', 'fraud_devices',
+        'fraud_merchants', 'fraud_transactions'
+    ]
+    
+    # MergeTree ORDER BY keys from create_tables; batches sorted on these
+    # let the server skip its own sort when writing each part
+    ORDER_KEYS = {
+        'customers': ['customer_id'],
+        'products': ['product_id'],
+        'transactions': ['customer_id', 'timestamp'],
+        'interactions': ['customer_id', 'timestamp'],
+        'fraud_customers': ['customer_id'],
+        'fraud_accounts': ['customer_id', 'account_id'],
+        'fraud_devices': ['device_id'],
+        'fraud_merchants': ['merchant_id'],
+        'fraud_transactions': ['from_account_id', 'timestamp']
+    }
+    
+    # Columns declared as Date (not DateTime) in create_tables
+    DATE_COLUMNS = frozenset(['registration_date', 'launch_date', 'date_of_birth'])
+    
+    def __init__(self, config: Optional[CHConfig] = None):
+        """Initialize ClickHouse connection from a config, read from the environment by default"""
+        self.config = config = config or CHConfig.from_env()
         
-        self.host = os.getenv('CLICKHOUSE_HOST')
-        self.port = int(os.getenv('CLICKHOUSE_PORT', 9440))
-        self.user = os.getenv('CLICKHOUSE_USER', 'default')
-        self.password = os.getenv('CLICKHOUSE_PASSWORD')
-        self.database = os.getenv('CLICKHOUSE_DATABASE', 'customer360')
-        self.secure = os.getenv('CLICKHOUSE_SECURE', 'true').lower() == 'true'
+        self.host = config.host
+        self.port = config.port
+        self.user = config.user
+        self.password = config.password
+        self.database = config.database
+        self.secure = config.secure
+        self.compression = config.compression
+        self.client_type = config.client_type
+        self.http_port = config.http_port
+        self.connect_timeout = config.connect_timeout
+        self.send_receive_timeout = config.send_receive_timeout
         
         # Configuration options
-        self.batch_size = int(os.getenv('INGESTION_BATCH_SIZE', 10000))
-        self.create_db_if_not_exists = os.getenv('CREATE_DATABASE_IF_NOT_EXISTS', 'true').lower() == 'true'
-        self.enable_table_checks = os.getenv('CHECK_TABLE_EXISTS', 'true').lower() == 'true'
-        self.drop_existing = os.getenv('DROP_EXISTING_TABLES', 'false').lower() == 'true'
-        self.truncate_before_load = os.getenv('TRUNCATE_BEFORE_LOAD', 'false').lower() == 'true'
-        self.skip_existing = os.getenv('SKIP_EXISTING_TABLES', 'false').lower() == 'true'
-        self.retry_attempts = int(os.getenv('INGESTION_RETRY_ATTEMPTS', 3))
-        self.retry_delay = int(os.getenv('INGESTION_RETRY_DELAY', 5))
+        self.batch_size = config.batch_size
+        self.async_insert_threshold = config.async_insert_threshold
+        
+        # Small inserts are buffered and coalesced server-side instead of each
+        # creating its own part; waiting keeps failures visible to the caller
+        self.async_insert_settings = {
+            'async_insert': 1,
+            'wait_for_async_insert': 1,
+            'async_insert_busy_timeout_ms': config.async_insert_busy_timeout_ms,
+            'async_insert_max_data_size': config.async_insert_max_data_size
+        }
+        self.create_db_if_not_exists = config.create_db_if_not_exists
+        self.enable_table_checks = config.enable_table_checks
+        self.drop_existing = config.drop_existing
+        self.truncate_before_load = config.truncate_before_load
+        self.skip_existing = config.skip_existing
+        self.retry_attempts = config.retry_attempts
+        self.retry_delay = config.retry_delay
+        self.retry_max_delay = config.retry_max_delay
+        self.optimize_after_load = config.optimize_after_load
+        self.optimize_timeout = config.optimize_timeout
+        
+        # Server-side block sizing for inserts: fewer, larger parts per load
+        self.insert_block_settings = {
+            'max_insert_block_size': config.max_insert_block_size,
+            'min_insert_block_size_rows': config.min_insert_block_size_rows
+        }
+        self.ingest_parallelism = config.ingest_parallelism
+        self.pool_size = config.pool_size
+        self.show_progress = config.show_progress
         
         if not self.host:
             logger.error("CLICKHOUSE_HOST environment variable is required. Please check your .env file.")
@@ -73,16 +333,11 @@ class ClickHouseClient:
             logger.error("CLICKHOUSE_PASSWORD environment variable is required. Please check your .env file.")
             raise ValueError("CLICKHOUSE_PASSWORD environment variable is required. Please check your .env file.")
         
-        # Initialize client without database first to check if it exists
+        # Connect without a database only when it may have to be created first;
+        # the same connection then switches to it instead of reconnecting
+        initial_database = None if self.create_db_if_not_exists else self.database
         try:
-            self.client = Client(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                secure=self.secure,
-                verify=self.secure
-            )
+            self.client = self._create_client(database=initial_database)
             logger.debug(f"Initial connection to ClickHouse: {self.host}:{self.port}")
         except Exception as e:
             logger.error(f"Failed to connect to ClickHouse at {self.host}:{self.port} - {e}")
@@ -92,21 +347,92 @@ class ClickHouseClient:
         if self.create_db_if_not_exists:
             self._ensure_database_exists()
         
-        # Reconnect with database specified
+        # Switch the existing connection to the database
         try:
-            self.client = Client(
-                host=self.host,
-                port=self.port,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-                secure=self.secure,
-                verify=self.secure
-            )
+            if self.create_db_if_not_exists:
+                self.client.execute(f"USE {self.database}")
+                # Any driver-level reconnect should land in the same database
+                self.client.connection.database = self.database
             logger.info(f"Connected to ClickHouse: {self.host}:{self.port}/{self.database}")
         except Exception as e:
             logger.error(f"Failed to connect to ClickHouse database {self.database} - {e}")
             raise ConnectionError(f"Cannot connect to ClickHouse database '{self.database}'. Please check database exists and credentials are correct.")
+        
+        # Pooled clients for concurrent work - the native driver is not thread-safe,
+        # so each borrower gets a connection to itself. Clients connect on first use
+        # and stay open, so TLS handshakes are paid once per pooled connection.
+        self._pool = queue.Queue()
+        for _ in range(self.pool_size):
+            self._pool.put(self._create_client(database=self.database))
+        
+        # Parquet files go straight to the server, as Arrow or as the raw file, when using the HTTP client
+        self.arrow_client = self._create_arrow_client() if self.client_type in ('connect', 'parquet') else None
+        
+        # INSERT statements are built once per table and column layout and reused for every batch
+        self._insert_statements = {}
+    
+    def _create_client(self, database: Optional[str] = None,
+                       send_receive_timeout: Optional[int] = None) -> Client:
+        """Create a native protocol client with this instance's connection settings"""
+        params = {
+            'host': self.host,
+            'port': self.port,
+            'user': self.user,
+            'password': self.password,
+            'secure': self.secure,
+            'verify': self.secure,
+            'compression': self.compression,
+            # Bounded so a stalled ingest worker fails into the retry loop
+            'connect_timeout': self.connect_timeout,
+            'send_receive_timeout': send_receive_timeout or self.send_receive_timeout,
+            'settings': self.insert_block_settings
+        }
+        if database:
+            params['database'] = database
+        return Client(**params)
+    
+    def _create_arrow_client(self):
+        """Create a clickhouse-connect HTTP client for Arrow inserts"""
+        compress = self.compression if self.compression in ('lz4', 'zstd') else bool(self.compression)
+        client = clickhouse_connect.get_client(
+            host=self.host,
+            port=self.http_port,
+            username=self.user,
+            password=self.password,
+            database=self.database,
+            secure=self.secure,
+            verify=self.secure,
+            compress=compress,
+            connect_timeout=self.connect_timeout,
+            send_receive_timeout=self.send_receive_timeout,
+            settings=self.insert_block_settings,
+            # No session id, so the client can be shared by worker threads
+            autogenerate_session_id=False,
+            # A keep-alive connection per ingest worker, so uploads never wait on
+            # the pool or pay a new TLS handshake per batch file
+            pool_mgr=httputil.get_pool_manager(verify=self.secure, num_pools=1,
+                                               maxsize=self.ingest_parallelism)
+        )
+        insert_format = 'Parquet' if self.client_type == 'parquet' else 'Arrow'
+        logger.info(f"Using {insert_format} inserts over HTTP: {self.host}:{self.http_port}/{self.database}")
+        return client
+    
+    @contextmanager
+    def _borrow(self):
+        """Borrow a pooled client for the duration of a with-block"""
+        client = self._pool.get()
+        try:
+            yield client
+        finally:
+            self._pool.put(client)
+    
+    def close(self):
+        """Disconnect the primary and all pooled clients"""
+        self.client.disconnect()
+        if self.arrow_client:
+            self.arrow_client.close()
+        while not self._pool.empty():
+            self._pool.get_nowait().disconnect()
     
     def execute_query(self, query: str, params: Optional[Dict] = None) -> List[Dict]:
         """Execute a query and return results"""
@@ -120,18 +446,9 @@ class ClickHouseClient:
     def _ensure_database_exists(self):
         """Ensure database exists, create if needed"""
         try:
-            # Check if database exists
-            result = self.client.execute(
-                "SELECT 1 FROM system.databases WHERE name = %(database)s",
-                {'database': self.database}
-            )
-            
-            if not result:
-                logger.info(f"Database '{self.database}' does not exist, creating...")
-                self.client.execute(f"CREATE DATABASE {self.database}")
-                logger.info(f" Database '{self.database}' created successfully")
-            else:
-                logger.info(f"Database '{self.database}' already exists")
+            # One round-trip; the server skips creation when it already exists
+            self.client.execute(f"CREATE DATABASE IF NOT EXISTS {self.database}")
+            logger.info(f"Database '{self.database}' ready")
                 
         except Exception as e:
             logger.error(f"Failed to check/create database: {e}")
@@ -140,17 +457,21 @@ class ClickHouseClient:
     def check_table_exists(self, table_name: str) -> bool:
         """Check if a table exists"""
         try:
-            result = self.client.execute(f"EXISTS TABLE {table_name}")
-            return result[0][0] == 1
+            return table_name in self._get_table_rows([table_name])
         except Exception as e:
             logger.error(f"Failed to check table existence: {e}")
             return False
     
+    def _known_table(self, table_name: str) -> str:
+        """Validate a table name against the managed tables before formatting it into DDL"""
+        if table_name not in self.TABLES:
+            raise ValueError(f"Refusing to run DDL against unmanaged table '{table_name}'")
+        return table_name
+    
     def get_table_row_count(self, table_name: str) -> int:
         """Get row count for a table"""
         try:
-            result = self.client.execute(f"SELECT COUNT(*) FROM {table_name}")
-            return result[0][0]
+            return self._get_table_rows([table_name]).get(table_name, 0)
         except Exception:
             return 0
 
@@ -159,24 +480,26 @@ class ClickHouseClient:
         try:
             # Prepare DataFrame for ClickHouse
             df = self._prepare_dataframe_for_clickhouse(df)
+            df = self._sort_by_order_key(table_name, df)
 
-            # Insert in batches
+            # Insert in batches, slicing the converted columns
             total_rows = len(df)
+            column_names = tuple(df.columns)
+            columns = self._to_columns(df)
             inserted_rows = 0
+            next_log = self.batch_size * 5
 
             for i in range(0, total_rows, self.batch_size):
-                batch = df.iloc[i:i + self.batch_size]
-
-                # Convert to list of tuples for insertion
-                data = [tuple(row) for row in batch.values]
+                batch = [col[i:i + self.batch_size] for col in columns]
 
                 # Insert batch
-                self.client.execute(f"INSERT INTO {table_name} VALUES", data)
-                inserted_rows += len(batch)
+                self._insert_columns(table_name, column_names, batch)
+                inserted_rows += len(batch[0])
 
                 # Log progress for large datasets
-                if total_rows > self.batch_size and inserted_rows % (self.batch_size * 5) == 0:
-                    logger.debug(f"  Inserted {inserted_rows:,}/{total_rows:,} rows into {table_name}")
+                if total_rows > self.batch_size and inserted_rows >= next_log:
+                    logger.debug("  Inserted %d/%d rows into %s", inserted_rows, total_rows, table_name)
+                    next_log += self.batch_size * 5
 
             logger.info(f"Inserted {inserted_rows:,} rows into {table_name}")
 
@@ -213,7 +536,8 @@ class ClickHouseClient:
                     brand String,
                     price Decimal(10,2),
                     launch_date Date,
-                    created_at DateTime
+                    created_at DateTime,
+                    INDEX idx_category category TYPE set(16) GRANULARITY 4
                 ) ENGINE = MergeTree()
                 ORDER BY product_id
             """,
@@ -324,23 +648,25 @@ class ClickHouseClient:
             """
         }
         
+        # Existence and row counts for every table in a single round-trip
+        existing_tables = self._get_table_rows(table_definitions)
+        
         for table_name, ddl in table_definitions.items():
             try:
-                # Check if table exists
-                table_exists = self.check_table_exists(table_name)
-                row_count = self.get_table_row_count(table_name) if table_exists else 0
+                table_exists = table_name in existing_tables
+                row_count = existing_tables.get(table_name, 0)
                 
                 if table_exists:
                     logger.info(f"Table '{table_name}' exists with {row_count:,} rows")
                     
                     if self.drop_existing:
                         logger.warning(f"Dropping existing table '{table_name}'")
-                        self.client.execute(f"DROP TABLE {table_name}")
+                        self.client.execute(f"DROP TABLE {self._known_table(table_name)}")
                         self.client.execute(ddl)
                         logger.info(f" Table '{table_name}' recreated")
                     elif self.truncate_before_load:
                         logger.warning(f"Truncating table '{table_name}'")
-                        self.client.execute(f"TRUNCATE TABLE {table_name}")
+                        self.client.execute(f"TRUNCATE TABLE {self._known_table(table_name)}")
                         logger.info(f" Table '{table_name}' truncated")
                     else:
                         logger.info(f" Table '{table_name}' ready (existing)")
@@ -353,16 +679,11 @@ class ClickHouseClient:
                 logger.error(f"Failed to handle table '{table_name}': {e}")
                 raise
     
-    def load_data_from_parquet(self, data_dir: str = "data", batch_size: int = 10000):
+    def load_data_from_parquet(self, data_dir: str = "data", batch_size: Optional[int] = None):
         """Load data from Parquet files into ClickHouse tables"""
+        batch_size = batch_size or self.batch_size
 
-        tables = [
-            'customers', 'products', 'transactions', 'interactions',
-            'fraud_customers', 'fraud_accounts', 'fraud_devices',
-            'fraud_merchants', 'fraud_transactions'
-        ]
-        
-        for table in tables:
+        for table in self.TABLES:
             # Check for single file first
             file_path = os.path.join(data_dir, f"{table}.parquet")
             batch_dir = os.path.join(data_dir, table)
@@ -371,10 +692,7 @@ class ClickHouseClient:
             if os.path.exists(file_path):
                 batch_files = [file_path]
             elif os.path.exists(batch_dir):
-                batch_files = []
-                for f in sorted(os.listdir(batch_dir)):
-                    if f.endswith('.parquet'):
-                        batch_files.append(os.path.join(batch_dir, f))
+                batch_files = self._list_parquet_files(batch_dir)
             else:
                 logger.warning(f"No data found for table '{table}' in {data_dir}")
                 continue
@@ -383,175 +701,329 @@ class ClickHouseClient:
             total_inserted = 0
             
             for batch_file in batch_files:
-                logger.debug(f"Processing batch file: {batch_file}")
-                
-                # Read Parquet file
-                df = pd.read_parquet(batch_file)
+                logger.debug("Processing batch file: %s", batch_file)
                 
-                # Convert data types for ClickHouse
-                if 'timestamp' in df.columns:
-                    df['timestamp'] = pd.to_datetime(df['timestamp'])
-                if 'created_at' in df.columns:
-                    df['created_at'] = pd.to_datetime(df['created_at'])
-                if 'registration_date' in df.columns:
-                    df['registration_date'] = pd.to_datetime(df['registration_date']).dt.date
-                if 'launch_date' in df.columns:
-                    df['launch_date'] = pd.to_datetime(df['launch_date']).dt.date
+                if self.arrow_client:
+                    inserted_rows = self._insert_parquet_file(table, batch_file)
+                    total_inserted += inserted_rows
+                    logger.info(f"  Loaded batch file {batch_file}: {inserted_rows:,} rows")
+                    continue
                 
-                # Insert data in batches
-                total_rows = len(df)
+                # Stream the Parquet file one record batch at a time
+                parquet_file = pq.ParquetFile(batch_file)
+                total_rows = parquet_file.metadata.num_rows
                 inserted_rows = 0
+                # Threshold rather than modulo, so progress is logged even when
+                # batch sizes don't land exactly on a multiple of the interval
+                next_log = 50000
                 
-                for i in range(0, total_rows, batch_size):
-                    batch = df.iloc[i:i + batch_size]
-                    
-                    # Convert to list of tuples for insertion
-                    data = [tuple(row) for row in batch.values]
-                    
+                for batch in self._iter_parquet_batches(parquet_file, batch_size):
                     # Insert batch
-                    self.client.execute(f"INSERT INTO {table} VALUES", data)
+                    self._insert_batch(table, batch)
                     inserted_rows += len(batch)
                     
-                    if inserted_rows % 50000 == 0:
-                        logger.info(f"  Inserted {inserted_rows:,}/{total_rows:,} rows from {batch_file}")
+                    if inserted_rows >= next_log:
+                        logger.info("  Inserted %d/%d rows from %s", inserted_rows, total_rows, batch_file)
+                        next_log = (inserted_rows // 50000 + 1) * 50000
                 
                 total_inserted += inserted_rows
                 logger.info(f"  Loaded batch file {batch_file}: {inserted_rows:,} rows")
             
             logger.info(f" Loaded {table}: {total_inserted:,} total rows")
+            
+            if self.optimize_after_load and total_inserted:
+                self._optimize_table(table)
     
     def load_batch_files(self, data_dir: str):
         """Load data from batch parquet files"""
-        tables = [
-            'customers', 'products', 'transactions', 'interactions',
-            'fraud_customers', 'fraud_accounts', 'fraud_devices',
-            'fraud_merchants', 'fraud_transactions'
-        ]
+        # Row counts for every table in one metadata round-trip, not one per table
+        existing_tables = self._get_table_rows(self.TABLES) if self.skip_existing else {}
         
-        for table in tables:
-            table_dir = os.path.join(data_dir, table)
-            
-            if not os.path.exists(table_dir):
-                logger.warning(f"Batch directory not found: {table_dir}")
-                continue
-            
-            # Get all batch files for this table
-            batch_files = sorted([
-                f for f in os.listdir(table_dir) 
-                if f.endswith('.parquet') and f.startswith(f"{table}_batch_")
-            ])
-            
-            if not batch_files:
-                logger.warning(f"No batch files found for {table} in {table_dir}")
-                continue
-            
-            # Check if we should skip this table
-            if self.skip_existing:
-                existing_rows = self.get_table_row_count(table)
-                if existing_rows > 0:
-                    logger.info(f"Skipping {table} - already has {existing_rows:,} rows")
+        with ThreadPoolExecutor(max_workers=self.ingest_parallelism) as executor:
+            for table in self.TABLES:
+                table_dir = os.path.join(data_dir, table)
+                
+                if not os.path.exists(table_dir):
+                    logger.warning(f"Batch directory not found: {table_dir}")
+                    continue
+                
+                # Get all batch files for this table
+                batch_files = self._list_parquet_files(table_dir, f"{table}_batch_")
+                
+                if not batch_files:
+                    logger.warning(f"No batch files found for {table} in {table_dir}")
                     continue
-            
-            logger.info(f"Loading {table} from {len(batch_files)} batch files...")
-            
-            total_inserted = 0
-            failed_batches = []
-            
-            # Load each batch file with progress tracking
-            show_progress = os.getenv('SHOW_PROGRESS_BARS', 'true').lower() == 'true'
-            batch_iterator = tqdm(batch_files, desc=f"Loading {table}") if show_progress else batch_files
-            
-            for batch_file in batch_iterator:
-                batch_path = os.path.join(table_dir, batch_file)
                 
-                success = False
-                for attempt in range(self.retry_attempts):
-                    try:
-                        # Read batch file
-                        df = pd.read_parquet(batch_path)
-                        
-                        # Convert data types for ClickHouse
-                        df = self._prepare_dataframe_for_clickhouse(df)
-                        
-                        # Insert batch with smaller sub-batches
-                        batch_inserted = self._insert_dataframe_in_batches(table, df)
+                # Check if we should skip this table
+                if self.skip_existing:
+                    existing_rows = existing_tables.get(table, 0)
+                    if existing_rows > 0:
+                        logger.info(f"Skipping {table} - already has {existing_rows:,} rows")
+                        continue
+                
+                logger.info(f"Loading {table} from {len(batch_files)} batch files "
+                            f"({self.ingest_parallelism} workers)...")
+                
+                total_inserted = 0
+                failed_batches = []
+                
+                # Load batch files concurrently, tracking progress from this thread
+                futures = {
+                    executor.submit(self._load_one_batch, table, batch_path): os.path.basename(batch_path)
+                    for batch_path in batch_files
+                }
+                progress = tqdm(total=len(batch_files), desc=f"Loading {table}", mininterval=1.0) if self.show_progress else None
+                
+                for future in as_completed(futures):
+                    batch_file = futures[future]
+                    batch_inserted = future.result()
+                    
+                    if batch_inserted is None:
+                        failed_batches.append(batch_file)
+                    else:
                         total_inserted += batch_inserted
-                        
-                        logger.debug(f" Loaded {batch_file}: {batch_inserted:,} rows")
-                        success = True
-                        break
-                        
-                    except Exception as e:
-                        logger.warning(f"Attempt {attempt + 1} failed for {batch_file}: {e}")
-                        if attempt < self.retry_attempts - 1:
-                            time.sleep(self.retry_delay)
-                        else:
-                            logger.error(f"Failed to load {batch_file} after {self.retry_attempts} attempts")
-                            failed_batches.append(batch_file)
+                    
+                    if progress:
+                        progress.update(1)
                 
-                if not success:
-                    failed_batches.append(batch_file)
+                if progress:
+                    progress.close()
+                
+                # Summary for this table
+                if failed_batches:
+                    logger.warning(f"️ {table}: Loaded {total_inserted:,} rows, {len(failed_batches)} batches failed")
+                    for failed_batch in sorted(failed_batches):
+                        logger.warning(f"   Failed: {failed_batch}")
+                else:
+                    logger.info(f" {table}: Successfully loaded {total_inserted:,} rows from all batches")
+                
+                if self.optimize_after_load and total_inserted:
+                    self._optimize_table(table)
+    
+    def _optimize_table(self, table_name: str):
+        """Merge a freshly loaded table's parts once, instead of merging during ingest"""
+        logger.info(f"Optimizing table '{table_name}'...")
+        # OPTIMIZE ... FINAL returns only once the merge is done, which on a large
+        # table can outlast the ingest socket timeout - use a client that waits longer
+        client = self._create_client(database=self.database, send_receive_timeout=self.optimize_timeout)
+        try:
+            client.execute(f"OPTIMIZE TABLE {self._known_table(table_name)} FINAL")
+            logger.info(f" Table '{table_name}' optimized")
+        except Exception as e:
+            # The data is loaded either way, and a merge already started keeps running
+            logger.warning(f"Stopped waiting for OPTIMIZE of '{table_name}' ({e}); "
+                           f"the merge may still be running on the server")
+        finally:
+            client.disconnect()
+    
+    @staticmethod
+    def _list_parquet_files(directory: str, prefix: str = '') -> List[str]:
+        """Sorted paths of the Parquet files in a directory whose names start with prefix"""
+        # One directory read; names and file types come from the cached DirEntry
+        with os.scandir(directory) as entries:
+            return sorted(
+                entry.path for entry in entries
+                if entry.name.startswith(prefix) and entry.name.endswith('.parquet')
+                and not entry.name.startswith('.') and entry.is_file()
+            )
+    
+    def _load_one_batch(self, table: str, batch_path: str) -> Optional[int]:
+        """Load a single batch file on a worker thread, returning rows inserted or None on failure"""
+        batch_file = os.path.basename(batch_path)
+        
+        # Transient errors are retried per INSERT, so a failure here is final
+        try:
+            batch_inserted = self._insert_parquet_file(table, batch_path)
+        except Exception as e:
+            logger.error(f"Failed to load {batch_file}: {e}")
+            return None
+        
+        logger.debug(" Loaded %s: %d rows", batch_file, batch_inserted)
+        return batch_inserted
+    
+    def _insert_parquet_file(self, table_name: str, path: str) -> int:
+        """Insert one Parquet file through the configured client, returning rows inserted"""
+        if self.client_type == 'parquet':
+            return self._insert_parquet_file_raw(table_name, path)
+        if self.arrow_client:
+            return self._insert_parquet_file_arrow(table_name, path)
+        
+        inserted_rows = 0
+        with self._borrow() as client:
+            # Stream the batch file without materializing it in full
+            for df in self._iter_parquet_batches(pq.ParquetFile(path)):
+                inserted_rows += self._insert_dataframe_in_batches(table_name, df, client=client)
+        return inserted_rows
+    
+    def _insert_parquet_file_arrow(self, table_name: str, path: str) -> int:
+        """Insert a Parquet file as Arrow streams, without converting rows to Python objects"""
+        order_key = self.ORDER_KEYS.get(table_name)
+        inserted_rows = 0
+        
+        # One record batch of at most batch_size rows in memory at a time,
+        # however large the file is
+        for record_batch in pq.ParquetFile(path).iter_batches(batch_size=self.batch_size):
+            arrow_table = self._cast_arrow_dates(pa.Table.from_batches([record_batch]))
             
-            # Summary for this table
-            if failed_batches:
-                logger.warning(f"️ {table}: Loaded {total_inserted:,} rows, {len(failed_batches)} batches failed")
-                for failed_batch in failed_batches:
-                    logger.warning(f"   Failed: {failed_batch}")
-            else:
-                logger.info(f" {table}: Successfully loaded {total_inserted:,} rows from all batches")
+            # Each insert becomes its own part, so sorting per batch is enough
+            if order_key and set(order_key).issubset(arrow_table.column_names):
+                arrow_table = arrow_table.sort_by([(col, 'ascending') for col in order_key])
+            
+            settings = self.async_insert_settings if arrow_table.num_rows < self.async_insert_threshold else None
+            self._with_retry(
+                lambda: self.arrow_client.insert_arrow(table_name, arrow_table, settings=settings),
+                f"{os.path.basename(path)} batch of {arrow_table.num_rows:,} rows"
+            )
+            inserted_rows += arrow_table.num_rows
+        
+        return inserted_rows
+    
+    def _insert_parquet_file_raw(self, table_name: str, path: str) -> int:
+        """Send a Parquet file's bytes as-is for the server to parse, with no client-side decoding"""
+        # Only the footer is read here, for the row count
+        num_rows = pq.ParquetFile(path).metadata.num_rows
+        settings = self.async_insert_settings if num_rows < self.async_insert_threshold else None
+        
+        def insert():
+            # Reopened per attempt so a retry streams the file from the start
+            with open(path, 'rb') as f:
+                self.arrow_client.raw_insert(table_name, insert_block=f, settings=settings, fmt='Parquet')
+        
+        self._with_retry(insert, os.path.basename(path))
+        return num_rows
+    
+    def _cast_arrow_dates(self, arrow_table: pa.Table) -> pa.Table:
+        """Cast timestamp columns bound for Date columns to date32 before they go over the wire"""
+        for i, field in enumerate(arrow_table.schema):
+            if field.name in self.DATE_COLUMNS and pa.types.is_timestamp(field.type):
+                # Unsafe cast drops the time of day, as the server would for a Date column
+                column = pc.cast(arrow_table.column(i), pa.date32(), safe=False)
+                arrow_table = arrow_table.set_column(i, field.name, column)
+        return arrow_table
+    
+    def _iter_parquet_batches(self, parquet_file: pq.ParquetFile, batch_size: Optional[int] = None):
+        """Yield prepared DataFrames of at most batch_size rows from a Parquet file"""
+        for record_batch in parquet_file.iter_batches(batch_size=batch_size or self.batch_size):
+            # date32 columns come through as datetime64 rather than per-row date objects
+            yield self._prepare_dataframe_for_clickhouse(record_batch.to_pandas(date_as_object=False))
     
     def _prepare_dataframe_for_clickhouse(self, df: pd.DataFrame) -> pd.DataFrame:
         """Prepare DataFrame for ClickHouse insertion"""
-        # Convert timestamp columns
-        for col in df.columns:
-            if 'timestamp' in col.lower():
-                df[col] = pd.to_datetime(df[col])
-            elif 'date' in col.lower() and col != 'created_at':
-                df[col] = pd.to_datetime(df[col]).dt.date
-            elif col == 'created_at':
-                df[col] = pd.to_datetime(df[col])
+        # Date and DateTime columns both stay datetime64; the driver truncates
+        # Date values itself, so no per-row datetime.date objects are built here
+        for col in _datetime_columns(tuple(df.columns)):
+            if not pd.api.types.is_datetime64_any_dtype(df[col]):
+                # Fixed ISO format parses vectorized, with no per-batch format inference
+                df[col] = pd.to_datetime(df[col], format='ISO8601', cache=True)
         
         return df
     
-    def _insert_dataframe_in_batches(self, table_name: str, df: pd.DataFrame) -> int:
-        """Insert DataFrame in smaller batches"""
+    def _insert_dataframe_in_batches(self, table_name: str, df: pd.DataFrame,
+                                     client: Optional[Client] = None) -> int:
+        """Insert DataFrame in smaller batches
+        
+        Batches under async_insert_threshold go through server-side async inserts,
+        so a small batch size doesn't leave a part per batch.
+        """
+        df = self._sort_by_order_key(table_name, df)
         total_rows = len(df)
+        # Columns are converted once and sliced per batch, instead of slicing
+        # a new DataFrame and converting it again for every batch
+        column_names = tuple(df.columns)
+        columns = self._to_columns(df)
         inserted_rows = 0
+        next_log = self.batch_size * 5
         
         for i in range(0, total_rows, self.batch_size):
-            batch = df.iloc[i:i + self.batch_size]
-            
-            # Convert to list of tuples for insertion
-            data = [tuple(row) for row in batch.values]
+            batch = [col[i:i + self.batch_size] for col in columns]
             
             # Insert batch
-            self.client.execute(f"INSERT INTO {table_name} VALUES", data)
-            inserted_rows += len(batch)
+            self._insert_columns(table_name, column_names, batch, client=client)
+            inserted_rows += len(batch[0])
             
             # Log progress for large batches
-            if total_rows > self.batch_size * 2 and inserted_rows % (self.batch_size * 5) == 0:
-                logger.debug(f"  Inserted {inserted_rows:,}/{total_rows:,} rows")
+            if total_rows > self.batch_size * 2 and inserted_rows >= next_log:
+                logger.debug("  Inserted %d/%d rows", inserted_rows, total_rows)
+                next_log += self.batch_size * 5
         
         return inserted_rows
     
+    def _sort_by_order_key(self, table_name: str, df: pd.DataFrame) -> pd.DataFrame:
+        """Sort rows by the table's ORDER BY key so inserted parts arrive pre-sorted"""
+        order_key = self.ORDER_KEYS.get(table_name)
+        if not order_key or not set(order_key).issubset(df.columns):
+            return df
+        return df.sort_values(order_key, kind='stable', ignore_index=True)
+    
+    def _insert_batch(self, table_name: str, batch: pd.DataFrame, client: Optional[Client] = None):
+        """Insert a DataFrame batch using the native protocol's columnar layout"""
+        batch = self._sort_by_order_key(table_name, batch)
+        self._insert_columns(table_name, tuple(batch.columns), self._to_columns(batch), client=client)
+    
+    @staticmethod
+    def _to_columns(df: pd.DataFrame) -> List[list]:
+        """Convert a DataFrame to one list of native values per column"""
+        # One list per column keeps each column's own dtype instead of
+        # upcasting the whole frame to an object matrix and building row tuples
+        return [df[col].tolist() for col in df.columns]
+    
+    def _insert_columns(self, table_name: str, column_names: tuple, columns: List[list],
+                        client: Optional[Client] = None):
+        """Insert column lists of equal length as one native columnar block"""
+        num_rows = len(columns[0]) if columns else 0
+        settings = self.async_insert_settings if num_rows < self.async_insert_threshold else None
+        client = client or self.client
+        self._with_retry(
+            lambda: client.execute(self._insert_statement(table_name, column_names), columns, columnar=True, settings=settings),
+            f"{table_name} batch of {num_rows:,} rows"
+        )
+    
+    def _with_retry(self, operation, description: str):
+        """Run an operation, retrying transient errors with exponential backoff and jitter"""
+        # Always at least one attempt, so a zero setting can't skip the operation
+        attempts = max(1, self.retry_attempts)
+        for attempt in range(attempts):
+            try:
+                return operation()
+            except TRANSIENT_ERRORS as e:
+                if attempt >= attempts - 1:
+                    raise
+                # Capped backoff; jitter scaled to the base delay spreads out
+                # workers that failed together
+                delay = min(self.retry_delay * (2 ** attempt), self.retry_max_delay) + random.uniform(0, self.retry_delay)
+                logger.warning(f"Attempt {attempt + 1} failed for {description}: {e} - retrying in {delay:.1f}s")
+                time.sleep(delay)
+    
+    def _insert_statement(self, table_name: str, column_names: tuple) -> str:
+        """Get the cached INSERT statement for a table and column layout"""
+        key = (table_name, column_names)
+        statement = self._insert_statements.get(key)
+        if statement is None:
+            # Naming the columns binds them by name, matching the order of the
+            # column lists rather than relying on the table's column order
+            columns = ', '.join(f"`{col}`" for col in column_names)
+            statement = self._insert_statements[key] = f"INSERT INTO {table_name} ({columns}) VALUES"
+        return statement
+    
+    def _get_table_rows(self, tables) -> Dict[str, int]:
+        """Get row counts of the given tables that exist, from system.tables metadata"""
+        result = self.client.execute(
+            "SELECT name, total_rows FROM system.tables "
+            "WHERE database = %(database)s AND name IN %(tables)s",
+            {'database': self.database, 'tables': tuple(tables)}
+        )
+        return {name: total_rows or 0 for name, total_rows in result}
+    
     def get_table_counts(self) -> Dict[str, int]:
         """Get row counts for all tables"""
-        tables = [
-            'customers', 'products', 'transactions', 'interactions',
-            'fraud_customers', 'fraud_accounts', 'fraud_devices',
-            'fraud_merchants', 'fraud_transactions'
-        ]
-        counts = {}
-
-        for table in tables:
-            try:
-                result = self.client.execute(f"SELECT COUNT(*) FROM {table}")
-                counts[table] = result[0][0]
-            except Exception as e:
-                logger.debug(f"Table {table} not found or error: {e}")
-                counts[table] = 0
+        try:
+            table_rows = self._get_table_rows(self.TABLES)
+        except Exception as e:
+            logger.debug(f"Failed to read table metadata: {e}")
+            table_rows = {}
 
-        return counts
+        # Tables that don't exist yet are reported as empty
+        return {table: table_rows.get(table, 0) for table in self.TABLES}
     
     def run_sample_queries(self):
         """Run sample analytical queries to verify data"""
@@ -592,10 +1064,17 @@ class ClickHouseClient:
             """
         }
         
-        for query_name, query in queries.items():
+        # Run all queries concurrently on pooled clients, report in order
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            futures = {
+                query_name: executor.submit(self._run_pooled_query, query)
+                for query_name, query in queries.items()
+            }
+        
+        for query_name, future in futures.items():
             try:
                 logger.info(f"\n {query_name}:")
-                result = self.client.execute(query)
+                result = future.result()
                 
                 for row in result[:5]:  # Show first 5 rows
                     print(f"   {row}")
@@ -606,101 +1085,29 @@ class ClickHouseClient:
             except Exception as e:
                 logger.error(f"Query failed: {e}")
     
+    def _run_pooled_query(self, query: str):
+        """Execute a read query on a client borrowed from the pool"""
+        with self._borrow() as client:
+            # No query cache: these queries verify a load, and cached results
+            # aren't invalidated by INSERTs
+            return client.execute(query)
+    
     def create_graph_schema_file(self, output_path: str = "puppygraph-schema.json"):
         """Create PuppyGraph schema configuration file"""
         
-        schema = {
-            "catalogs": [
-                {
-                    "name": "clickhouse",
-                    "type": "clickhouse",
-                    "jdbc": {
-                        "url": f"jdbc:clickhouse://{self.host}:{self.port}/{self.database}?ssl=true",
-                        "username": self.user,
-                        "password": self.password,
-                        "driverClassName": "com.clickhouse.jdbc.ClickHouseDriver"
-                    }
-                }
-            ],
-            "graph": {
-                "vertices": [
-                    {
-                        "label": "Customer",
-                        "mappedTableSource": {
-                            "catalog": "clickhouse",
-                            "schema": "default",
-                            "table": "customers",
-                            "metaFields": {"id": "customer_id"}
-                        },
-                        "properties": {
-                            "email": {"column": "email", "type": "STRING"},
-                            "name": {"column": "name", "type": "STRING"},
-                            "segment": {"column": "segment", "type": "STRING"},
-                            "ltv": {"column": "ltv", "type": "DOUBLE"}
-                        }
-                    },
-                    {
-                        "label": "Product",
-                        "mappedTableSource": {
-                            "catalog": "clickhouse",
-                            "schema": "default",
-                            "table": "products",
-                            "metaFields": {"id": "product_id"}
-                        },
-                        "properties": {
-                            "name": {"column": "name", "type": "STRING"},
-                            "category": {"column": "category", "type": "STRING"},
-                            "brand": {"column": "brand", "type": "STRING"},
-                            "price": {"column": "price", "type": "DOUBLE"}
-                        }
-                    }
-                ],
-                "edges": [
-                    {
-                        "label": "PURCHASED",
-                        "mappedTableSource": {
-                            "catalog": "clickhouse",
-                            "schema": "default",
-                            "table": "transactions",
-                            "metaFields": {
-                                "id": "transaction_id",
-                                "from": "customer_id",
-                                "to": "product_id"
-                            },
-                            "predicate": "status = 'completed'"
-                        },
-                        "properties": {
-                            "amount": {"column": "amount", "type": "DOUBLE"},
-                            "timestamp": {"column": "timestamp", "type": "TIMESTAMP"},
-                            "channel": {"column": "channel", "type": "STRING"}
-                        }
-                    },
-                    {
-                        "label": "VIEWED",
-                        "mappedTableSource": {
-                            "catalog": "clickhouse",
-                            "schema": "default",
-                            "table": "interactions",
-                            "metaFields": {
-                                "id": "interaction_id",
-                                "from": "customer_id",
-                                "to": "product_id"
-                            },
-                            "predicate": "type = 'view'"
-                        },
-                        "properties": {
-                            "timestamp": {"column": "timestamp", "type": "TIMESTAMP"},
-                            "duration": {"column": "duration", "type": "INTEGER"},
-                            "device": {"column": "device", "type": "STRING"}
-                        }
-                    }
-                ]
-            }
-        }
+        schema = copy.deepcopy(_SCHEMA_TEMPLATE)
+        schema["catalogs"][0]["jdbc"].update({
+            "url": f"jdbc:clickhouse://{self.host}:{self.port}/{self.database}?ssl=true",
+            "username": self.user,
+            "password": self.password
+        })
         
-        import json
-        with open(output_path, 'w') as f:
-            json.dump(schema, f, indent=2)
+        if orjson is not None:
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(schema, option=orjson.OPT_INDENT_2))
+        else:
+            with open(output_path, 'w') as f:
+                json.dump(schema, f, indent=2)
         
         logger.info(f"Created PuppyGraph schema: {output_path}")
 
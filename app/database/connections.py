@@ -6,22 +6,61 @@ Real-time connections to ClickHouse and PuppyGraph for live demo queries
 
 import os
 import time
+import queue
+import random
+import asyncio
+import functools
 import logging
-from typing import Dict, List, Any, Optional, Tuple
-from contextlib import contextmanager
-import clickhouse_connect
-from neo4j import GraphDatabase
-import pandas as pd
-from dataclasses import dataclass
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Dict, List, Any, Optional, Tuple, Union, Literal, ClassVar, TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+# Library module - handlers and levels are left to the application
 logger = logging.getLogger(__name__)
 
+# Database drivers are imported on first connect, so importing this module
+# doesn't pay for both backends (and pandas/numpy behind them) up front
+_clickhouse_connect = None
+_neo4j = None
+
+def _load_clickhouse_connect():
+    """Import clickhouse_connect once and return the module"""
+    global _clickhouse_connect
+    if _clickhouse_connect is None:
+        import clickhouse_connect
+        import clickhouse_connect.driver.exceptions
+        _clickhouse_connect = clickhouse_connect
+    return _clickhouse_connect
+
+def _load_neo4j():
+    """Import neo4j once and return the module"""
+    global _neo4j
+    if _neo4j is None:
+        import neo4j
+        import neo4j.graph
+        _neo4j = neo4j
+    return _neo4j
+
+@functools.lru_cache(maxsize=128)
+def _row_type(columns: Tuple[str, ...]):
+    """Row namedtuple for a column layout, generated once per layout"""
+    return namedtuple('Row', columns, rename=True)
+
 @dataclass
 class QueryResult:
-    """Standardized query result structure"""
-    data: List[Dict[str, Any]]
+    """Standardized query result structure
+
+    ``data`` is an Arrow table or DataFrame for ClickHouse results (row
+    namedtuples or dicts on request), and a dict of column lists for graph
+    results.
+    """
+    data: Union["pa.Table", "pd.DataFrame", List[Tuple], List[Dict[str, Any]], Dict[str, List[Any]]]
     execution_time: float
     row_count: int
     query_text: str
@@ -41,28 +80,60 @@ class ClickHouseConnection:
         self.password = password
         self.database = database
         self.client = None
+        self.retry_attempts = 3
+        self.retry_delay = 0.1
+        # Guards swapping in a fresh client; queries just read self.client
+        self._lock = threading.Lock()
 
     def connect(self) -> bool:
-        """Establish connection to ClickHouse"""
+        """Establish connection to ClickHouse, replacing any existing client"""
         try:
-            self.client = clickhouse_connect.get_client(
+            client = _load_clickhouse_connect().get_client(
                 host=self.host,
                 port=self.port,
                 username=self.username,
                 password=self.password,
-                database=self.database
+                database=self.database,
+                # No shared session, so health checks and concurrent queries don't collide
+                autogenerate_session_id=False
             )
             # Test connection
-            self.client.query("SELECT 1")
-            logger.info(f"Connected to ClickHouse at {self.host}:{self.port}")
+            client.query("SELECT 1")
+            with self._lock:
+                old_client, self.client = self.client, client
+            if old_client:
+                old_client.close()
+            logger.info("Connected to ClickHouse at %s:%s", self.host, self.port)
             return True
         except Exception as e:
-            logger.error(f"Failed to connect to ClickHouse: {str(e)}")
+            logger.error("Failed to connect to ClickHouse: %s", e)
             return False
 
-    def execute_query(self, query: str, parameters: Dict = None) -> QueryResult:
-        """Execute SQL query with timing and error handling"""
-        start_time = time.time()
+    def ping(self) -> bool:
+        """Cheap liveness check against the server's /ping endpoint"""
+        client = self.client
+        return bool(client and client.ping())
+
+    def _with_retry(self, operation):
+        """Run a query call, retrying connection-level failures with exponential backoff"""
+        transient = _load_clickhouse_connect().driver.exceptions.OperationalError
+        for attempt in range(self.retry_attempts):
+            try:
+                return operation()
+            except transient:
+                if attempt == self.retry_attempts - 1:
+                    raise
+                time.sleep(self.retry_delay * 2 ** attempt + random.uniform(0, self.retry_delay))
+
+    def execute_query(self, query: str, parameters: Dict = None,
+                      return_format: Literal["arrow", "pandas", "rows", "dicts"] = "arrow") -> QueryResult:
+        """Execute SQL query with timing and error handling
+
+        Results come back as an Arrow table by default, or a DataFrame, without
+        building Python objects per row. "rows" gives namedtuples (use
+        ``_asdict()`` where a dict is needed); "dicts" keeps the list-of-dicts form.
+        """
+        start_time = time.perf_counter()
 
         try:
             if not self.client:
@@ -70,32 +141,44 @@ class ClickHouseConnection:
                     raise ConnectionError("Failed to establish ClickHouse connection")
 
             # Execute query with parameters
-            if parameters:
-                result = self.client.query(query, parameters=parameters)
+            if return_format == "arrow":
+                data = self._with_retry(lambda: self.client.query_arrow(query, parameters=parameters))
+                row_count = data.num_rows
+            elif return_format == "pandas":
+                data = self._with_retry(lambda: self.client.query_df(query, parameters=parameters))
+                row_count = len(data)
             else:
-                result = self.client.query(query)
-
-            execution_time = time.time() - start_time
+                if parameters:
+                    result = self._with_retry(lambda: self.client.query(query, parameters=parameters))
+                else:
+                    result = self._with_retry(lambda: self.client.query(query))
+
+                if not result.result_rows:
+                    data = []
+                elif return_format == "rows":
+                    # One tuple per row; field names are shared by the cached type
+                    make_row = _row_type(tuple(result.column_names))._make
+                    data = [make_row(row) for row in result.result_rows]
+                else:
+                    # Convert to list of dictionaries
+                    columns = result.column_names
+                    data = [dict(zip(columns, row)) for row in result.result_rows]
+                row_count = len(data)
 
-            # Convert to list of dictionaries
-            if result.result_rows:
-                columns = result.column_names
-                data = [dict(zip(columns, row)) for row in result.result_rows]
-            else:
-                data = []
+            execution_time = time.perf_counter() - start_time
 
             return QueryResult(
                 data=data,
                 execution_time=execution_time,
-                row_count=len(data),
+                row_count=row_count,
                 query_text=query,
                 database_type="ClickHouse",
                 status="success"
             )
 
         except Exception as e:
-            execution_time = time.time() - start_time
-            logger.error(f"ClickHouse query failed: {str(e)}")
+            execution_time = time.perf_counter() - start_time
+            logger.error("ClickHouse query failed: %s", e)
 
             return QueryResult(
                 data=[],
@@ -107,80 +190,146 @@ class ClickHouseConnection:
                 error=str(e)
             )
 
+    async def aexecute_query(self, query: str, parameters: Dict = None,
+                             return_format: Literal["arrow", "pandas", "rows", "dicts"] = "arrow") -> QueryResult:
+        """Async variant of execute_query; the blocking HTTP call runs in the default executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.execute_query, query, parameters, return_format)
+        )
+
     def close(self):
         """Close connection"""
         if self.client:
             self.client.close()
             self.client = None
 
+# Bolt drivers shared across PuppyGraphConnection instances - each driver owns
+# its own connection pool, so one per endpoint/credentials is enough. Entries are
+# [driver, users], and a driver is only closed when its last user releases it
+_graph_drivers: Dict[Tuple[str, str, str], List[Any]] = {}
+_graph_drivers_lock = threading.Lock()
+
 class PuppyGraphConnection:
     """Real PuppyGraph/Neo4j database connection"""
 
     def __init__(self, uri: str = "bolt://localhost:7687",
-                 username: str = "neo4j", password: str = "password"):
+                 username: str = "neo4j", password: str = "password",
+                 max_pool_size: int = 50, acquisition_timeout: float = 30.0,
+                 max_connection_lifetime: int = 3600):
         self.uri = uri
         self.username = username
         self.password = password
+        self.max_pool_size = max_pool_size
+        self.acquisition_timeout = acquisition_timeout
+        self.max_connection_lifetime = max_connection_lifetime
         self.driver = None
+        # Created on first aexecute_query - async drivers belong to one event loop,
+        # so the driver is rebuilt when called from a different loop
+        self.async_driver = None
+        self._async_loop = None
+        # Idle read sessions, reused across queries instead of opened per call
+        self._session_pool = queue.Queue()
+
+    def _acquire_driver(self):
+        """Take a reference to the shared driver for this endpoint, creating it on first use"""
+        key = (self.uri, self.username, self.password)
+        with _graph_drivers_lock:
+            entry = _graph_drivers.get(key)
+            if entry is None:
+                driver = _load_neo4j().GraphDatabase.driver(
+                    self.uri,
+                    auth=(self.username, self.password),
+                    max_connection_pool_size=self.max_pool_size,
+                    connection_acquisition_timeout=self.acquisition_timeout,
+                    max_connection_lifetime=self.max_connection_lifetime
+                )
+                entry = _graph_drivers[key] = [driver, 0]
+            entry[1] += 1
+            return entry[0]
+
+    def _release_driver(self):
+        """Drop this instance's driver reference, closing the driver if no one else uses it"""
+        driver, self.driver = self.driver, None
+        if driver is None:
+            return
+        key = (self.uri, self.username, self.password)
+        with _graph_drivers_lock:
+            entry = _graph_drivers.get(key)
+            if entry is None or entry[0] is not driver:
+                last_user = True
+            else:
+                entry[1] -= 1
+                last_user = entry[1] == 0
+                if last_user:
+                    del _graph_drivers[key]
+        if last_user:
+            driver.close()
 
     def connect(self) -> bool:
         """Establish connection to PuppyGraph"""
         try:
-            self.driver = GraphDatabase.driver(
-                self.uri,
-                auth=(self.username, self.password)
-            )
+            if self.driver is None:
+                self.driver = self._acquire_driver()
             # Test connection
-            with self.driver.session() as session:
+            with self.driver.session(default_access_mode=_load_neo4j().READ_ACCESS) as session:
                 session.run("RETURN 1")
-            logger.info(f"Connected to PuppyGraph at {self.uri}")
+            logger.info("Connected to PuppyGraph at %s", self.uri)
             return True
         except Exception as e:
-            logger.error(f"Failed to connect to PuppyGraph: {str(e)}")
+            logger.error("Failed to connect to PuppyGraph: %s", e)
+            # Leave no driver behind, so the next query tries to connect again
+            self.close()
+            return False
+
+    def ping(self) -> bool:
+        """Check that the driver can still reach the server"""
+        driver = self.driver
+        if not driver:
             return False
+        try:
+            driver.verify_connectivity()
+            return True
+        except Exception:
+            return False
+
+    def reconnect(self) -> bool:
+        """Drop pooled sessions and this instance's driver reference, then connect afresh"""
+        self.close()
+        return self.connect()
 
     def execute_query(self, cypher: str, parameters: Dict = None) -> QueryResult:
         """Execute Cypher query with timing and error handling"""
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         try:
             if not self.driver:
                 if not self.connect():
                     raise ConnectionError("Failed to establish PuppyGraph connection")
 
-            with self.driver.session() as session:
-                if parameters:
-                    result = session.run(cypher, parameters)
-                else:
-                    result = session.run(cypher)
-
-                # Convert to list of dictionaries
-                data = []
-                for record in result:
-                    row = {}
-                    for key in record.keys():
-                        value = record[key]
-                        # Handle Neo4j node/relationship objects
-                        if hasattr(value, '__dict__'):
-                            row[key] = dict(value)
-                        else:
-                            row[key] = value
-                    data.append(row)
-
-            execution_time = time.time() - start_time
+            session = self._acquire_session()
+            try:
+                data, row_count = session.execute_read(self._read_columns, cypher, parameters)
+            except Exception:
+                # Don't hand a session in an unknown state to the next query
+                session.close()
+                raise
+            self._session_pool.put_nowait(session)
+
+            execution_time = time.perf_counter() - start_time
 
             return QueryResult(
                 data=data,
                 execution_time=execution_time,
-                row_count=len(data),
+                row_count=row_count,
                 query_text=cypher,
                 database_type="PuppyGraph",
                 status="success"
             )
 
         except Exception as e:
-            execution_time = time.time() - start_time
-            logger.error(f"PuppyGraph query failed: {str(e)}")
+            execution_time = time.perf_counter() - start_time
+            logger.error("PuppyGraph query failed: %s", e)
 
             return QueryResult(
                 data=[],
@@ -192,15 +341,210 @@ class PuppyGraphConnection:
                 error=str(e)
             )
 
+    async def aexecute_query(self, cypher: str, parameters: Dict = None) -> QueryResult:
+        """Execute Cypher query on the async driver, without holding a thread while waiting"""
+        start_time = time.perf_counter()
+
+        try:
+            neo4j = _load_neo4j()
+            loop = asyncio.get_running_loop()
+            if self.async_driver is not None and self._async_loop is not loop:
+                await self._discard_async_driver()
+            if self.async_driver is None:
+                self._async_loop = loop
+                self.async_driver = neo4j.AsyncGraphDatabase.driver(
+                    self.uri,
+                    auth=(self.username, self.password),
+                    max_connection_pool_size=self.max_pool_size,
+                    connection_acquisition_timeout=self.acquisition_timeout,
+                    max_connection_lifetime=self.max_connection_lifetime
+                )
+
+            async with self.async_driver.session(default_access_mode=neo4j.READ_ACCESS) as session:
+                result = await session.run(cypher, parameters or {})
+
+                entity_types = (neo4j.graph.Node, neo4j.graph.Relationship)
+                keys = result.keys()
+                data = {key: [] for key in keys}
+                appenders = [data[key].append for key in keys]
+                row_count = 0
+                async for record in result:
+                    for append, value in zip(appenders, record):
+                        append(dict(value) if isinstance(value, entity_types) else value)
+                    row_count += 1
+
+            execution_time = time.perf_counter() - start_time
+
+            return QueryResult(
+                data=data,
+                execution_time=execution_time,
+                row_count=row_count,
+                query_text=cypher,
+                database_type="PuppyGraph",
+                status="success"
+            )
+
+        except Exception as e:
+            execution_time = time.perf_counter() - start_time
+            logger.error("PuppyGraph query failed: %s", e)
+
+            return QueryResult(
+                data=[],
+                execution_time=execution_time,
+                row_count=0,
+                query_text=cypher,
+                database_type="PuppyGraph",
+                status="error",
+                error=str(e)
+            )
+
+    def _acquire_session(self):
+        """Take an idle session from the pool, or open a new one if none is free"""
+        try:
+            return self._session_pool.get_nowait()
+        except queue.Empty:
+            return self.driver.session(default_access_mode=_load_neo4j().READ_ACCESS)
+
+    @staticmethod
+    def _read_columns(tx, cypher: str, parameters: Optional[Dict]) -> Tuple[Dict[str, List[Any]], int]:
+        """Run a read query in a managed transaction and collect its columns"""
+        result = tx.run(cypher, parameters or {})
+        neo4j = _load_neo4j()
+        entity_types = (neo4j.graph.Node, neo4j.graph.Relationship)
+
+        # Collect columns directly - one list per key, no per-row dicts
+        keys = result.keys()
+        data = {key: [] for key in keys}
+        appenders = [data[key].append for key in keys]
+        row_count = 0
+        for record in result:
+            for append, value in zip(appenders, record):
+                # Handle Neo4j node/relationship objects
+                append(dict(value) if isinstance(value, entity_types) else value)
+            row_count += 1
+        return data, row_count
+
     def close(self):
         """Close connection"""
-        if self.driver:
-            self.driver.close()
-            self.driver = None
+        while not self._session_pool.empty():
+            self._session_pool.get_nowait().close()
+        self._release_driver()
+
+    async def _discard_async_driver(self):
+        """Drop an async driver left over from an earlier event loop (e.g. a finished asyncio.run)"""
+        driver, self.async_driver, self._async_loop = self.async_driver, None, None
+        try:
+            await driver.close()
+        except Exception as e:
+            # Its sockets belong to the old loop and may not close cleanly from this one
+            logger.debug("Could not close stale async driver: %s", e)
+
+    async def aclose(self):
+        """Close the async driver, if one was opened"""
+        if self.async_driver:
+            if self._async_loop is not asyncio.get_running_loop():
+                await self._discard_async_driver()
+                return
+            await self.async_driver.close()
+            self.async_driver = None
+            self._async_loop = None
+
+# Deeper variable-length expansion grows combinatorially on dense
+# neighbourhoods, so traversal depth is capped and candidate paths are
+# limited before sorting
+MAX_NETWORK_DEPTH = 3
+
+_NETWORK_QUERY = """
+        MATCH (c:Customer {{id: $persona_id}})
+        OPTIONAL MATCH (c)-[r:INFLUENCES|FOLLOWS|RECOMMENDS*1..{depth}]-(connected:Customer)
+        WHERE r IS NOT NULL
+        WITH c, r, connected
+        LIMIT 500
+        RETURN
+            c.id as customer_id,
+            c.name as customer_name,
+            connected.id as connected_id,
+            connected.name as connected_name,
+            type(r[0]) as relationship_type,
+            r[0].strength as influence_strength,
+            r[0].interactions as interaction_count
+        ORDER BY r[0].strength DESC
+        LIMIT 50
+        """
+
+_NETWORK_BATCH_QUERY = """
+        UNWIND $persona_ids AS persona_id
+        MATCH (c:Customer {{id: persona_id}})
+        // Caps apply per persona, exactly as in the single-persona query
+        CALL {{
+            WITH c
+            OPTIONAL MATCH (c)-[r:INFLUENCES|FOLLOWS|RECOMMENDS*1..{depth}]-(connected:Customer)
+            WHERE r IS NOT NULL
+            WITH r, connected
+            LIMIT 500
+            RETURN r, connected
+            ORDER BY r[0].strength DESC
+            LIMIT 50
+        }}
+        RETURN
+            c.id as customer_id,
+            c.name as customer_name,
+            connected.id as connected_id,
+            connected.name as connected_name,
+            type(r[0]) as relationship_type,
+            r[0].strength as influence_strength,
+            r[0].interactions as interaction_count
+        """
 
 class DatabaseManager:
     """Manages both ClickHouse and PuppyGraph connections"""
 
+    # Query texts are fixed; per-call values are bound as parameters
+    CUSTOMER_QUERY: ClassVar[str] = """
+        SELECT
+            customer_id,
+            transaction_date,
+            product_name,
+            amount,
+            channel,
+            category
+        FROM customer_transactions
+        WHERE customer_id = {persona_id:String}
+          AND transaction_date >= {date_start:Date}
+          AND transaction_date <= {date_end:Date}
+          AND amount >= {min_amount:Float64}
+          AND amount <= {max_amount:Float64}
+        ORDER BY transaction_date DESC
+        LIMIT 100
+        """
+
+    CUSTOMER_BATCH_QUERY: ClassVar[str] = """
+        SELECT
+            customer_id,
+            transaction_date,
+            product_name,
+            amount,
+            channel,
+            category
+        FROM customer_transactions
+        WHERE customer_id IN {persona_ids:Array(String)}
+          AND transaction_date >= {date_start:Date}
+          AND transaction_date <= {date_end:Date}
+          AND amount >= {min_amount:Float64}
+          AND amount <= {max_amount:Float64}
+        ORDER BY customer_id, transaction_date DESC
+        LIMIT 100 BY customer_id
+        """
+
+    # Path length bounds cannot be parameters in Cypher, so one query text is
+    # built per allowed depth
+    NETWORK_QUERIES: ClassVar[Dict[int, str]] = {
+        depth: _NETWORK_QUERY.format(depth=depth) for depth in range(1, MAX_NETWORK_DEPTH + 1)
+    }
+    NETWORK_BATCH_QUERIES: ClassVar[Dict[int, str]] = {
+        depth: _NETWORK_BATCH_QUERY.format(depth=depth) for depth in range(1, MAX_NETWORK_DEPTH + 1)
+    }
+
     def __init__(self, clickhouse_config: Dict = None, puppygraph_config: Dict = None):
         # Default configurations
         self.ch_config = clickhouse_config or {
@@ -214,13 +558,43 @@ class DatabaseManager:
         self.pg_config = puppygraph_config or {
             'uri': os.getenv('PUPPYGRAPH_URI', 'bolt://localhost:7687'),
             'username': os.getenv('PUPPYGRAPH_USER', 'neo4j'),
-            'password': os.getenv('PUPPYGRAPH_PASSWORD', 'password')
+            'password': os.getenv('PUPPYGRAPH_PASSWORD', 'password'),
+            'max_pool_size': int(os.getenv('PUPPYGRAPH_POOL_SIZE', '50'))
         }
 
         self.clickhouse = ClickHouseConnection(**self.ch_config)
         self.puppygraph = PuppyGraphConnection(**self.pg_config)
         self._connections_tested = False
 
+        # Successful results for repeated (database, query, parameters) lookups;
+        # entries expire after the TTL so stale reads stay bounded
+        self.cache_ttl = float(os.getenv('QUERY_CACHE_TTL', '60'))
+        self.cache_size = int(os.getenv('QUERY_CACHE_SIZE', '256'))
+        self._cache: "OrderedDict[Tuple, Tuple[float, QueryResult]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # Background keep-alive, started with start_health_checks()
+        self.health_check_interval = float(os.getenv('DB_HEALTH_CHECK_INTERVAL', '30'))
+        self._health_stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+
+        # Long-lived workers for running the two backends' queries side by side,
+        # so no threads are started per request; each request uses two of them.
+        # Created on first use, and again after close_all_connections()
+        self.query_workers = int(os.getenv('DB_QUERY_WORKERS', '8'))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Return the shared query executor, starting it if needed"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.query_workers,
+                    thread_name_prefix="db-query"
+                )
+            return self._executor
+
     def test_connections(self) -> Tuple[bool, bool]:
         """Test both database connections"""
         ch_status = self.clickhouse.connect()
@@ -228,65 +602,242 @@ class DatabaseManager:
         self._connections_tested = True
         return ch_status, pg_status
 
+    def check_health(self):
+        """Ping both backends and reconnect any that stopped answering"""
+        if not self.clickhouse.ping():
+            logger.warning("ClickHouse health check failed, reconnecting")
+            self.clickhouse.connect()
+        if not self.puppygraph.ping():
+            logger.warning("PuppyGraph health check failed, reconnecting")
+            self.puppygraph.reconnect()
+
+    def start_health_checks(self):
+        """Check connections in a daemon thread so stale ones are replaced off the query path"""
+        if self._health_thread and self._health_thread.is_alive():
+            return
+        self._health_stop.clear()
+        self._health_thread = threading.Thread(
+            target=self._health_loop, name="db-health-check", daemon=True
+        )
+        self._health_thread.start()
+
+    def stop_health_checks(self):
+        """Stop the background health check thread"""
+        self._health_stop.set()
+        if self._health_thread:
+            self._health_thread.join()
+            self._health_thread = None
+
+    def _health_loop(self):
+        """Run check_health immediately and then every health_check_interval seconds"""
+        while True:
+            try:
+                self.check_health()
+            except Exception as e:
+                logger.error("Health check failed: %s", e)
+            if self._health_stop.wait(self.health_check_interval):
+                return
+
     def execute_customer_analysis(self, persona_id: str, parameters: Dict) -> Tuple[QueryResult, QueryResult]:
         """Execute customer analysis queries on both databases"""
 
         # Build ClickHouse transaction analysis query
-        ch_query = self._build_clickhouse_customer_query(persona_id, parameters)
+        ch_query, ch_params = self._build_clickhouse_customer_query(persona_id, parameters)
 
         # Build PuppyGraph network analysis query
-        pg_query = self._build_puppygraph_network_query(persona_id, parameters)
+        pg_query, pg_params = self._build_puppygraph_network_query(persona_id, parameters)
 
-        # Execute both queries
-        ch_result = self.clickhouse.execute_query(ch_query, parameters)
-        pg_result = self.puppygraph.execute_query(pg_query, parameters)
+        # Execute both queries concurrently - they are independent and I/O bound,
+        # so wall time is the slower of the two rather than their sum
+        executor = self._get_executor()
+        ch_future = executor.submit(self._cached_query, self.clickhouse, "ClickHouse", ch_query, ch_params)
+        pg_future = executor.submit(self._cached_query, self.puppygraph, "PuppyGraph", pg_query, pg_params)
 
-        return ch_result, pg_result
+        return ch_future.result(), pg_future.result()
 
-    def _build_clickhouse_customer_query(self, persona_id: str, parameters: Dict) -> str:
-        """Build ClickHouse SQL query for customer transactions"""
-        date_start = parameters.get('date_start', '2024-01-01')
-        date_end = parameters.get('date_end', '2024-12-31')
-        min_amount = parameters.get('min_amount', 0)
-        max_amount = parameters.get('max_amount', 10000)
+    def execute_customer_analysis_batch(self, persona_ids: List[str],
+                                        parameters: Dict) -> Dict[str, Tuple[QueryResult, QueryResult]]:
+        """Execute customer analysis for many personas with one query per database
 
-        return f"""
-        SELECT
-            customer_id,
-            transaction_date,
-            product_name,
-            amount,
-            channel,
-            category
-        FROM customer_transactions
-        WHERE customer_id = '{persona_id}'
-          AND transaction_date >= '{date_start}'
-          AND transaction_date <= '{date_end}'
-          AND amount >= {min_amount}
-          AND amount <= {max_amount}
-        ORDER BY transaction_date DESC
-        LIMIT 100
+        Results are split back per persona, so each entry matches what
+        execute_customer_analysis returns for that persona alone.
         """
+        ch_query, ch_params = self._build_clickhouse_customer_batch_query(persona_ids, parameters)
+        pg_query, pg_params = self._build_puppygraph_network_batch_query(persona_ids, parameters)
+
+        executor = self._get_executor()
+        ch_future = executor.submit(self.clickhouse.execute_query, ch_query, ch_params)
+        pg_future = executor.submit(self.puppygraph.execute_query, pg_query, pg_params)
+        ch_result, pg_result = ch_future.result(), pg_future.result()
+
+        ch_split = self._split_arrow_result(ch_result, persona_ids)
+        pg_split = self._split_column_result(pg_result, persona_ids)
+        return {pid: (ch_split[pid], pg_split[pid]) for pid in persona_ids}
+
+    @staticmethod
+    def _split_arrow_result(result: QueryResult, persona_ids: List[str]) -> Dict[str, QueryResult]:
+        """Split an Arrow result ordered by customer_id into per-persona results"""
+        if result.status != "success":
+            return {pid: result for pid in persona_ids}
+
+        # Rows arrive grouped by customer_id, so each persona is one contiguous slice
+        starts, counts = {}, {}
+        for i, customer_id in enumerate(result.data.column('customer_id').to_pylist()):
+            starts.setdefault(customer_id, i)
+            counts[customer_id] = counts.get(customer_id, 0) + 1
+
+        split = {}
+        for pid in persona_ids:
+            table = result.data.slice(starts.get(pid, 0), counts.get(pid, 0))
+            split[pid] = QueryResult(
+                data=table,
+                execution_time=result.execution_time,
+                row_count=table.num_rows,
+                query_text=result.query_text,
+                database_type=result.database_type,
+                status=result.status
+            )
+        return split
+
+    @staticmethod
+    def _split_column_result(result: QueryResult, persona_ids: List[str]) -> Dict[str, QueryResult]:
+        """Split a column-wise graph result into per-persona results"""
+        if result.status != "success":
+            return {pid: result for pid in persona_ids}
+
+        rows_by_persona = {pid: [] for pid in persona_ids}
+        for i, customer_id in enumerate(result.data.get('customer_id', [])):
+            if customer_id in rows_by_persona:
+                rows_by_persona[customer_id].append(i)
+
+        split = {}
+        for pid, rows in rows_by_persona.items():
+            split[pid] = QueryResult(
+                data={key: [values[i] for i in rows] for key, values in result.data.items()},
+                execution_time=result.execution_time,
+                row_count=len(rows),
+                query_text=result.query_text,
+                database_type=result.database_type,
+                status=result.status
+            )
+        return split
 
-    def _build_puppygraph_network_query(self, persona_id: str, parameters: Dict) -> str:
-        """Build PuppyGraph Cypher query for network analysis"""
-        network_depth = parameters.get('network_depth', 2)
+    async def aexecute_customer_analysis(self, persona_id: str, parameters: Dict) -> Tuple[QueryResult, QueryResult]:
+        """Async variant of execute_customer_analysis, awaiting both queries together"""
+        ch_query, ch_params = self._build_clickhouse_customer_query(persona_id, parameters)
+        pg_query, pg_params = self._build_puppygraph_network_query(persona_id, parameters)
 
-        return f"""
-        MATCH (c:Customer {{id: '{persona_id}'}})
-        OPTIONAL MATCH (c)-[r:INFLUENCES|FOLLOWS|RECOMMENDS*1..{network_depth}]-(connected:Customer)
-        WHERE r IS NOT NULL
-        RETURN
-            c.id as customer_id,
-            c.name as customer_name,
-            connected.id as connected_id,
-            connected.name as connected_name,
-            type(r[0]) as relationship_type,
-            r[0].strength as influence_strength,
-            r[0].interactions as interaction_count
-        ORDER BY r[0].strength DESC
-        LIMIT 50
+        ch_result, pg_result = await asyncio.gather(
+            self._acached_query(self.clickhouse, "ClickHouse", ch_query, ch_params),
+            self._acached_query(self.puppygraph, "PuppyGraph", pg_query, pg_params)
+        )
+        return ch_result, pg_result
+
+    @staticmethod
+    def _cache_key(database_type: str, query: str, parameters: Dict) -> Optional[Tuple]:
+        """Cache key for a query, or None when parameter values are unhashable"""
+        try:
+            return (database_type, query, frozenset((parameters or {}).items()))
+        except TypeError:
+            return None
+
+    def _cache_get(self, key: Optional[Tuple]) -> Optional[QueryResult]:
+        """Return a cached result that has not expired yet"""
+        if key is None:
+            return None
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.cache_ttl:
+                self._cache.move_to_end(key)
+                return self._copy_result(entry[1])
+        return None
+
+    def _cache_put(self, key: Optional[Tuple], result: QueryResult):
+        """Store a successful result, evicting the least recently used entries"""
+        if key is None or result.status != "success":
+            return
+        # Stored as a copy, so the caller that ran the query can't change it either
+        result = self._copy_result(result)
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic(), result)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _copy_result(result: QueryResult) -> QueryResult:
+        """Copy a result's mutable containers, so cache users can't change each other's data"""
+        data = result.data
+        if isinstance(data, dict):
+            data = {key: list(values) for key, values in data.items()}
+        elif isinstance(data, list):
+            data = [dict(row) if isinstance(row, dict) else row for row in data]
+        elif hasattr(data, 'iloc'):
+            data = data.copy()
+        # Arrow tables are immutable and shared as-is
+        return replace(result, data=data)
+
+    def _cached_query(self, connection, database_type: str, query: str, parameters: Dict) -> QueryResult:
+        """Run a query through the result cache, executing it on a miss or expiry"""
+        key = self._cache_key(database_type, query, parameters)
+        result = self._cache_get(key)
+        if result is None:
+            result = connection.execute_query(query, parameters)
+            self._cache_put(key, result)
+        return result
+
+    async def _acached_query(self, connection, database_type: str, query: str, parameters: Dict) -> QueryResult:
+        """Async counterpart of _cached_query"""
+        key = self._cache_key(database_type, query, parameters)
+        result = self._cache_get(key)
+        if result is None:
+            result = await connection.aexecute_query(query, parameters)
+            self._cache_put(key, result)
+        return result
+
+    def clear_cache(self):
+        """Drop all cached query results, e.g. after reloading data"""
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _build_clickhouse_customer_query(self, persona_id: str, parameters: Dict) -> Tuple[str, Dict]:
+        """Build ClickHouse SQL query for customer transactions and its bound parameters
+
+        Values are bound server-side, so the query text is the same for every
+        persona and can be served from ClickHouse's query cache.
         """
+        bound = {
+            'persona_id': persona_id,
+            'date_start': parameters.get('date_start', '2024-01-01'),
+            'date_end': parameters.get('date_end', '2024-12-31'),
+            'min_amount': parameters.get('min_amount', 0),
+            'max_amount': parameters.get('max_amount', 10000)
+        }
+        return self.CUSTOMER_QUERY, bound
+
+    def _build_puppygraph_network_query(self, persona_id: str, parameters: Dict) -> Tuple[str, Dict]:
+        """Build PuppyGraph Cypher query for network analysis and its bound parameters"""
+        return self.NETWORK_QUERIES[self._network_depth(parameters)], {'persona_id': persona_id}
+
+    def _build_clickhouse_customer_batch_query(self, persona_ids: List[str], parameters: Dict) -> Tuple[str, Dict]:
+        """Build one ClickHouse query covering several personas, 100 rows each"""
+        _, bound = self._build_clickhouse_customer_query(None, parameters)
+        del bound['persona_id']
+        bound['persona_ids'] = list(persona_ids)
+        return self.CUSTOMER_BATCH_QUERY, bound
+
+    def _build_puppygraph_network_batch_query(self, persona_ids: List[str], parameters: Dict) -> Tuple[str, Dict]:
+        """Build one Cypher query covering several personas, 50 connections each"""
+        bound = {'persona_ids': list(persona_ids)}
+        return self.NETWORK_BATCH_QUERIES[self._network_depth(parameters)], bound
+
+    def _network_depth(self, parameters: Dict) -> int:
+        """Requested traversal depth, clamped to the pre-built range"""
+        depth = parameters.get('network_depth')
+        # An explicit None means "use the default", same as leaving it out
+        if depth is None:
+            depth = 2
+        return max(1, min(int(depth), MAX_NETWORK_DEPTH))
 
     def get_connection_status(self) -> Dict[str, Any]:
         """Get status of database connections"""
@@ -312,8 +863,32 @@ class DatabaseManager:
 
     def close_all_connections(self):
         """Close all database connections"""
+        self.stop_health_checks()
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True)
         self.clickhouse.close()
         self.puppygraph.close()
 
-# Global database manager instance
-db_manager = DatabaseManager()
\ No newline at end of file
+    async def aclose_all_connections(self):
+        """Close all connections, including async drivers"""
+        self.close_all_connections()
+        await self.puppygraph.aclose()
+
+# Global database manager instance, created on first use
+_db_manager: Optional[DatabaseManager] = None
+_db_manager_lock = threading.Lock()
+
+def get_db_manager() -> DatabaseManager:
+    """Return the shared DatabaseManager, constructing it on first call
+
+    The shared manager is long-lived, so it keeps its connections warm with
+    background health checks.
+    """
+    global _db_manager
+    with _db_manager_lock:
+        if _db_manager is None:
+            _db_manager = DatabaseManager()
+            _db_manager.start_health_checks()
+        return _db_manager
\ No newline at end of file
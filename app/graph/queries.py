@@ -5,43 +5,461 @@ Essential queries for customer insights using PuppyGraph
 """
 
 import os
+import copy
+import itertools
+import time
+import asyncio
 import logging
-from typing import Dict, List, Any, Optional
-from neo4j import GraphDatabase
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+import pandas as pd
+from neo4j import GraphDatabase, AsyncGraphDatabase, Query, READ_ACCESS
 from dotenv import load_dotenv
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+load_dotenv()
+
+
+@dataclass(frozen=True)
+class _Config:
+    """PuppyGraph connection settings"""
+    host: str
+    port: int
+    username: str
+    password: str
+    database: Optional[str]
+    query_timeout: float
+    
+    @classmethod
+    def from_env(cls) -> '_Config':
+        """Build settings from environment variables (.env is loaded at import)"""
+        return cls(
+            host=os.getenv('PUPPYGRAPH_HOST', 'localhost'),
+            port=7687,  # PuppyGraph Cypher port
+            username='puppygraph',
+            password=os.getenv('PUPPYGRAPH_PASSWORD', 'puppygraph123'),
+            # All queries here are reads; sessions open in read mode so a cluster can
+            # route them to followers, and a runaway traversal is cut off server-side
+            database=os.getenv('PUPPYGRAPH_DATABASE') or None,
+            query_timeout=float(os.getenv('PUPPYGRAPH_QUERY_TIMEOUT', 30))
+        )
+
+
+# Read once per process; instances no longer re-walk the filesystem for .env
+_CFG = _Config.from_env()
+
+# Process-wide circuit breaker: after a failed connect, new instances go
+# straight to mock mode for a cool-down instead of each waiting out a timeout
+CONNECT_COOLDOWN_SECONDS = 30
+_CB = {'open_until': 0.0}
+
+
+# Cypher is built once at import; every call passes the same string objects
+# and only the parameters change
+_Q_CUSTOMER_360 = """
+    MATCH (c:Customer {customer_id: $customer_id})
+    
+    // Only the five most recent events of each kind are materialised
+    CALL {
+        WITH c
+        MATCH (c)-[p:PURCHASED]->(product:Product)
+        WITH p, product
+        ORDER BY p.timestamp DESC
+        LIMIT 5
+        RETURN COLLECT({
+            product: product.name,
+            category: product.category,
+            amount: p.amount,
+            timestamp: p.timestamp
+        }) AS recent_purchases
+    }
+    CALL {
+        WITH c
+        MATCH (c)-[v:VIEWED]->(viewed:Product)
+        WITH v, viewed
+        ORDER BY v.timestamp DESC
+        LIMIT 5
+        RETURN COLLECT({
+            product: viewed.name,
+            category: viewed.category,
+            timestamp: v.timestamp,
+            duration: v.duration
+        }) AS recent_views
+    }
+    
+    RETURN c.name AS customer_name,
+           c.email AS email,
+           c.segment AS segment,
+           c.ltv AS ltv,
+           COUNT { (c)-[:PURCHASED]->(:Product) } AS total_purchases,
+           COUNT { (c)-[:VIEWED]->(:Product) } AS total_views,
+           recent_purchases,
+           recent_views
+    """
+
+_Q_CUSTOMER_360_BATCH = """
+    UNWIND $customer_ids AS cid
+    MATCH (c:Customer {customer_id: cid})
+    
+    // Only the five most recent events of each kind are materialised
+    CALL {
+        WITH c
+        MATCH (c)-[p:PURCHASED]->(product:Product)
+        WITH p, product
+        ORDER BY p.timestamp DESC
+        LIMIT 5
+        RETURN COLLECT({
+            product: product.name,
+            category: product.category,
+            amount: p.amount,
+            timestamp: p.timestamp
+        }) AS recent_purchases
+    }
+    CALL {
+        WITH c
+        MATCH (c)-[v:VIEWED]->(viewed:Product)
+        WITH v, viewed
+        ORDER BY v.timestamp DESC
+        LIMIT 5
+        RETURN COLLECT({
+            product: viewed.name,
+            category: viewed.category,
+            timestamp: v.timestamp,
+            duration: v.duration
+        }) AS recent_views
+    }
+    
+    RETURN cid,
+           c.name AS customer_name,
+           c.email AS email,
+           c.segment AS segment,
+           c.ltv AS ltv,
+           COUNT { (c)-[:PURCHASED]->(:Product) } AS total_purchases,
+           COUNT { (c)-[:VIEWED]->(:Product) } AS total_views,
+           recent_purchases,
+           recent_views
+    """
+
+_Q_RECOMMENDATIONS = """
+    // Find customers with similar purchase patterns
+    MATCH (target:Customer {customer_id: $customer_id})-[:PURCHASED]->(p:Product)
+    WITH target, COLLECT(p) AS targetProducts
+    
+    MATCH (other:Customer)-[:PURCHASED]->(p:Product)
+    WHERE p IN targetProducts AND other <> target
+    WITH target, other, COUNT(DISTINCT p) AS commonProducts
+    WHERE commonProducts >= 2
+    
+    // Find products purchased by similar customers but not by target
+    MATCH (other)-[:PURCHASED]->(rec:Product)
+    WHERE NOT (target)-[:PURCHASED]->(rec)
+    
+    RETURN rec.name AS product_name,
+           rec.category AS category,
+           rec.brand AS brand,
+           rec.price AS price,
+           COUNT(DISTINCT other) AS recommended_by_customers,
+           AVG(commonProducts) AS similarity_score
+    ORDER BY recommended_by_customers DESC, similarity_score DESC
+    LIMIT $limit
+    """
+
+_Q_JOURNEY = """
+    MATCH (c:Customer {customer_id: $customer_id})
+    
+    // Purchases and views are matched independently and concatenated, so the
+    // intermediate rows are P + V rather than P x V; each branch only keeps
+    // the events that can reach the requested page
+    CALL {
+        WITH c
+        MATCH (c)-[p:PURCHASED]->(purchased:Product)
+        RETURN 'PURCHASE' AS event_type,
+               purchased.name AS product_name,
+               purchased.category AS category,
+               p.amount AS amount,
+               null AS duration,
+               p.timestamp AS timestamp,
+               p.channel AS channel,
+               null AS device
+        ORDER BY timestamp DESC
+        LIMIT $offset + $limit
+        UNION ALL
+        WITH c
+        MATCH (c)-[v:VIEWED]->(viewed:Product)
+        RETURN 'VIEW' AS event_type,
+               viewed.name AS product_name,
+               viewed.category AS category,
+               null AS amount,
+               v.duration AS duration,
+               v.timestamp AS timestamp,
+               null AS channel,
+               v.device AS device
+        ORDER BY timestamp DESC
+        LIMIT $offset + $limit
+    }
+    
+    RETURN event_type,
+           product_name,
+           category,
+           amount,
+           duration,
+           timestamp,
+           channel,
+           device
+    ORDER BY timestamp DESC
+    SKIP $offset
+    LIMIT $limit
+    """
+
+# Optional filters are nullable parameters, so each query has one text and
+# the planner caches a single plan
+_Q_TOP_CUSTOMERS = """
+    MATCH (c:Customer)
+    WHERE $segment IS NULL OR c.segment = $segment
+    
+    // Pattern comprehensions aggregate per customer, so intermediate rows
+    // scale with customers rather than purchases
+    WITH c,
+         COUNT { (c)-[:PURCHASED]->(:Product) } AS total_purchases,
+         // Nulls are skipped, as SUM and COLLECT(DISTINCT ...) did
+         [(c)-[p:PURCHASED]->(:Product) WHERE p.amount IS NOT NULL | p.amount] AS amounts,
+         [(c)-[:PURCHASED]->(product:Product) WHERE product.category IS NOT NULL | product.category] AS purchased_categories
+    WHERE total_purchases > 0
+    
+    WITH c,
+         total_purchases,
+         REDUCE(total = 0.0, amount IN amounts | total + amount) AS total_spent,
+         REDUCE(seen = [], category IN purchased_categories |
+                CASE WHEN category IN seen THEN seen ELSE seen + category END) AS categories
+    
+    RETURN c.customer_id AS customer_id,
+           c.name AS customer_name,
+           c.segment AS segment,
+           c.ltv AS ltv,
+           total_purchases,
+           ROUND(total_spent, 2) AS total_spent,
+           SIZE(categories) AS unique_categories,
+           categories[..3] AS top_categories
+    ORDER BY total_spent DESC
+    LIMIT $limit
+    """
+
+_Q_POPULAR_PRODUCTS = """
+    MATCH (c:Customer)-[purchased:PURCHASED]->(p:Product)
+    WHERE $category IS NULL OR p.category = $category
+    
+    WITH p, 
+         COUNT(purchased) AS purchase_count,
+         COUNT(DISTINCT c) AS unique_customers,
+         SUM(purchased.amount) AS total_revenue,
+         AVG(purchased.amount) AS avg_purchase_amount
+    
+    RETURN p.name AS product_name,
+           p.category AS category,
+           p.brand AS brand,
+           p.price AS list_price,
+           purchase_count,
+           unique_customers,
+           ROUND(total_revenue, 2) AS total_revenue,
+           ROUND(avg_purchase_amount, 2) AS avg_purchase_amount
+    ORDER BY purchase_count DESC
+    LIMIT $limit
+    """
+
+_Q_CATEGORY_AFFINITY = """
+    // One pass over PURCHASED: each customer's distinct categories, paired up
+    MATCH (c:Customer)-[:PURCHASED]->(p:Product)
+    WITH c, COLLECT(DISTINCT p.category) AS basket
+    UNWIND basket AS category1
+    UNWIND basket AS category2
+    WITH category1, category2
+    WHERE category1 <= category2  // Avoid duplicates; self-pairs count category customers
+    
+    WITH category1, category2, COUNT(*) AS customers
+    WITH COLLECT({category1: category1, category2: category2, customers: customers}) AS pairs
+    WITH pairs, [pair IN pairs WHERE pair.category1 = pair.category2] AS totals
+    
+    UNWIND pairs AS pair
+    WITH pair, totals
+    WHERE pair.category1 < pair.category2
+    WITH pair.category1 AS category1,
+         pair.category2 AS category2,
+         pair.customers AS customers_buying_both,
+         [t IN totals WHERE t.category1 = pair.category1][0].customers AS total_category1_customers,
+         [t IN totals WHERE t.category1 = pair.category2][0].customers AS total_category2_customers
+    
+    // Calculate affinity metrics
+    WITH category1, category2, customers_buying_both,
+         total_category1_customers, total_category2_customers,
+         ROUND(toFloat(customers_buying_both) / total_category1_customers, 3) AS affinity_1_to_2,
+         ROUND(toFloat(customers_buying_both) / total_category2_customers, 3) AS affinity_2_to_1
+    
+    RETURN category1,
+           category2,
+           customers_buying_both,
+           ROUND((affinity_1_to_2 + affinity_2_to_1) / 2, 3) AS avg_affinity
+    ORDER BY avg_affinity DESC
+    LIMIT $limit
+    """
+
+_Q_SEGMENT_ANALYSIS = """
+    MATCH (c:Customer)
+    OPTIONAL MATCH (c)-[p:PURCHASED]->(product:Product)
+    
+    WITH c.segment AS segment,
+         COUNT(DISTINCT c) AS total_customers,
+         COUNT(p) AS total_purchases,
+         SUM(p.amount) AS total_revenue,
+         AVG(c.ltv) AS avg_ltv,
+         COUNT(DISTINCT product.category) AS unique_categories_purchased
+    
+    RETURN segment,
+           total_customers,
+           total_purchases,
+           ROUND(total_revenue, 2) AS total_revenue,
+           ROUND(toFloat(total_purchases) / total_customers, 1) AS avg_purchases_per_customer,
+           ROUND(total_revenue / total_customers, 2) AS avg_revenue_per_customer,
+           ROUND(avg_ltv, 2) AS avg_ltv,
+           unique_categories_purchased
+    ORDER BY total_revenue DESC
+    """
+
+# The search term arrives already lowercased, so only the properties are
+# case-folded per row
+_Q_SEARCH = """
+    MATCH (c:Customer)
+    WHERE toLower(c.name) CONTAINS $term_lc
+       OR toLower(c.email) CONTAINS $term_lc
+    
+    OPTIONAL MATCH (c)-[p:PURCHASED]->(product:Product)
+    WITH c, COUNT(p) AS total_purchases, SUM(p.amount) AS total_spent
+    
+    RETURN c.customer_id AS customer_id,
+           c.name AS customer_name,
+           c.email AS email,
+           c.segment AS segment,
+           c.ltv AS ltv,
+           total_purchases,
+           ROUND(total_spent, 2) AS total_spent
+    ORDER BY total_spent DESC
+    SKIP $offset
+    LIMIT $limit
+    """
+
+
+# Sample data for mock mode, built once at import; methods hand out copies
+_MOCK_SEGMENTS = [
+    {
+        'segment': 'Premium',
+        'total_customers': 150000,
+        'total_purchases': 750000,
+        'total_revenue': 125000000.50,
+        'avg_purchases_per_customer': 5.0,
+        'avg_revenue_per_customer': 833.33,
+        'avg_ltv': 5200.50,
+        'unique_categories_purchased': 8
+    },
+    {
+        'segment': 'Regular',
+        'total_customers': 450000,
+        'total_purchases': 1350000,
+        'total_revenue': 189000000.75,
+        'avg_purchases_per_customer': 3.0,
+        'avg_revenue_per_customer': 420.00,
+        'avg_ltv': 2800.75,
+        'unique_categories_purchased': 6
+    },
+    {
+        'segment': 'Basic',
+        'total_customers': 400000,
+        'total_purchases': 800000,
+        'total_revenue': 96000000.25,
+        'avg_purchases_per_customer': 2.0,
+        'avg_revenue_per_customer': 240.00,
+        'avg_ltv': 1200.25,
+        'unique_categories_purchased': 4
+    }
+]
+
+_MOCK_CUSTOMERS = [
+    {'customer_id': '0002d9cc-ce1e-4ed2-b169-7d1a778e7a72', 'customer_name': 'Michael Myers', 'email': 'michael.myers@example.org', 'segment': 'Premium', 'ltv': 5200.50, 'total_purchases': 15, 'total_spent': 8750.25},
+    {'customer_id': '00038af4-afee-4e3a-8ba2-9b31d77eff7f', 'customer_name': 'John Mcconnell', 'email': 'john.mcconnell@example.com', 'segment': 'Regular', 'ltv': 2800.75, 'total_purchases': 8, 'total_spent': 3420.50},
+    {'customer_id': '00054351-cc20-43e4-a10e-9e6e39fc4311', 'customer_name': 'Sarah Duncan', 'email': 'sarah.duncan@example.net', 'segment': 'Premium', 'ltv': 6100.00, 'total_purchases': 18, 'total_spent': 12450.75},
+    {'customer_id': '0008ab35-aa33-40ca-bd85-64c3870e310f', 'customer_name': 'Michael Gardner', 'email': 'michael.gardner@gmail.com', 'segment': 'Regular', 'ltv': 3200.25, 'total_purchases': 10, 'total_spent': 4680.00},
+    {'customer_id': '0009a6c7-832e-4ab8-b803-a3046b06a9f9', 'customer_name': 'John Palmer', 'email': 'john.palmer@yahoo.com', 'segment': 'Basic', 'ltv': 1500.50, 'total_purchases': 5, 'total_spent': 1200.25}
+]
+
+# Lowercased search fields, folded once rather than on every search
+_MOCK_CUSTOMERS_LC = [
+    (customer, customer['customer_name'].lower(), customer['email'].lower())
+    for customer in _MOCK_CUSTOMERS
+]
+
+_MOCK_PRODUCTS = [
+    {'product_name': 'iPhone 15 Pro Max', 'category': 'Electronics', 'brand': 'Apple', 'list_price': 1199.99, 'purchase_count': 8542, 'unique_customers': 7821, 'total_revenue': 10250000.58, 'avg_purchase_amount': 1201.25},
+    {'product_name': 'Premium Coffee Beans', 'category': 'Food', 'brand': 'Starbucks', 'list_price': 24.99, 'purchase_count': 6234, 'unique_customers': 4521, 'total_revenue': 155742.66, 'avg_purchase_amount': 24.99},
+    {'product_name': 'Wireless Headphones', 'category': 'Electronics', 'brand': 'Sony', 'list_price': 299.99, 'purchase_count': 5874, 'unique_customers': 5102, 'total_revenue': 1762000.26, 'avg_purchase_amount': 299.99},
+    {'product_name': 'Organic Cotton T-Shirt', 'category': 'Clothing', 'brand': 'Patagonia', 'list_price': 45.00, 'purchase_count': 4521, 'unique_customers': 3876, 'total_revenue': 203445.00, 'avg_purchase_amount': 45.00},
+    {'product_name': 'Smart Watch', 'category': 'Electronics', 'brand': 'Samsung', 'list_price': 399.99, 'purchase_count': 4102, 'unique_customers': 3654, 'total_revenue': 1640000.98, 'avg_purchase_amount': 399.99},
+    {'product_name': 'Yoga Mat', 'category': 'Sports', 'brand': 'Lululemon', 'list_price': 78.00, 'purchase_count': 3845, 'unique_customers': 3201, 'total_revenue': 299910.00, 'avg_purchase_amount': 78.00},
+    {'product_name': 'Running Shoes', 'category': 'Sports', 'brand': 'Nike', 'list_price': 149.99, 'purchase_count': 3654, 'unique_customers': 3298, 'total_revenue': 548000.46, 'avg_purchase_amount': 149.99},
+    {'product_name': 'Skincare Set', 'category': 'Beauty', 'brand': 'Glossier', 'list_price': 89.00, 'purchase_count': 3102, 'unique_customers': 2876, 'total_revenue': 276078.00, 'avg_purchase_amount': 89.00}
+]
+
 
 class Customer360Queries:
     """Customer 360 graph analytics using Cypher queries"""
     
+    # Whole-graph aggregates change slowly, so results are shared across
+    # instances for a few minutes instead of re-running on every page load
+    ANALYTICS_CACHE_TTL = 300
+    ANALYTICS_CACHE_SIZE = 256
+    _analytics_cache: Dict[Tuple, Tuple[float, List[Dict]]] = {}
+    _analytics_cache_lock = threading.Lock()
+    
     def __init__(self):
         """Initialize connection to PuppyGraph via Neo4j Bolt protocol"""
-        load_dotenv()
-        
-        self.host = os.getenv('PUPPYGRAPH_HOST', 'localhost')
-        self.port = 7687  # PuppyGraph Cypher port
-        self.username = 'puppygraph'
-        self.password = os.getenv('PUPPYGRAPH_PASSWORD', 'puppygraph123')
+        self.host = _CFG.host
+        self.port = _CFG.port
+        self.username = _CFG.username
+        self.password = _CFG.password
+        self.database = _CFG.database
+        self.query_timeout = _CFG.query_timeout
         self.driver = None
         self.mock_mode = False
         
         # Create Neo4j driver to connect to PuppyGraph
         uri = f"bolt://{self.host}:{self.port}"
         
+        if time.monotonic() < _CB['open_until']:
+            logger.info("PuppyGraph recently unreachable - running in mock mode with sample data")
+            self.mock_mode = True
+            return
+        
         try:
-            self.driver = GraphDatabase.driver(uri, auth=(self.username, self.password))
-            # Test the connection
-            with self.driver.session() as session:
-                session.run("RETURN 1")
-            logger.info(f"Successfully connected to PuppyGraph at {uri}")
+            self.driver = GraphDatabase.driver(
+                uri,
+                auth=(self.username, self.password),
+                max_connection_pool_size=50,
+                connection_acquisition_timeout=30,
+                max_connection_lifetime=3600,
+                connection_timeout=5,
+                keep_alive=True
+            )
+            # Test the connection without opening a session
+            self.driver.verify_connectivity()
+            logger.info("Successfully connected to PuppyGraph at %s", uri)
         except Exception as e:
-            logger.warning(f"Failed to connect to PuppyGraph at {uri}: {e}")
+            logger.warning("Failed to connect to PuppyGraph at %s: %s", uri, e)
             logger.info("Running in mock mode with sample data")
+            _CB['open_until'] = time.monotonic() + CONNECT_COOLDOWN_SECONDS
             self.mock_mode = True
+            if self.driver:
+                self.driver.close()
             self.driver = None
     
     def close(self):
@@ -49,6 +467,18 @@ class Customer360Queries:
         if self.driver:
             self.driver.close()
     
+    def _timed(self, query: str) -> Query:
+        """Attach the server-side transaction timeout to a query"""
+        return Query(query, timeout=self.query_timeout)
+    
+    def _session(self):
+        """Open a read session for one call
+        
+        Sessions aren't thread-safe, so none is shared; opening one only borrows
+        a connection from the driver's pool, which is cheap once the pool is warm.
+        """
+        return self.driver.session(database=self.database, default_access_mode=READ_ACCESS)
+    
     def run_query(self, query: str, parameters: Dict = None) -> List[Dict]:
         """Execute a Cypher query and return results"""
         if self.mock_mode or not self.driver:
@@ -56,112 +486,99 @@ class Customer360Queries:
             return []
             
         try:
-            with self.driver.session() as session:
-                result = session.run(query, parameters or {})
-                return [record.data() for record in result]
+            with self._session() as session:
+                return session.run(self._timed(query), parameters or {}).data()
         except Exception as e:
-            logger.error(f"Cypher query failed: {e}")
-            logger.debug(f"Query: {query}")
-            logger.debug(f"Parameters: {parameters}")
-            logger.warning("Switching to mock mode due to query failure")
-            self.mock_mode = True
+            logger.error("Cypher query failed: %s", e)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Query: %s", query)
+                logger.debug("Parameters: %s", parameters)
+            # One failed query shouldn't disable the shared instance; callers
+            # fall back to sample data for this call only
             return []
     
-    def get_customer_360_view(self, customer_id: str) -> Dict:
-        """Get complete 360-degree view of a customer"""
+    def run_query_df(self, query: str, parameters: Dict = None) -> pd.DataFrame:
+        """Execute a Cypher query and return results as a DataFrame
         
-        query = """
-        MATCH (c:Customer {customer_id: $customer_id})
-        OPTIONAL MATCH (c)-[p:PURCHASED]->(product:Product)
-        OPTIONAL MATCH (c)-[v:VIEWED]->(viewed:Product)
+        Built by the driver's Result.to_df(), for tabular consumers that would
+        otherwise turn the list of dicts into a frame themselves.
+        """
+        if self.mock_mode or not self.driver:
+            logger.debug("Running in mock mode - returning empty result")
+            return pd.DataFrame()
         
-        WITH c, 
-             COLLECT(DISTINCT {
-                 product: product.name,
-                 category: product.category,
-                 amount: p.amount,
-                 timestamp: p.timestamp
-             }) AS purchases,
-             COLLECT(DISTINCT {
-                 product: viewed.name,
-                 category: viewed.category,
-                 timestamp: v.timestamp,
-                 duration: v.duration
-             }) AS views
+        try:
+            with self._session() as session:
+                return session.run(self._timed(query), parameters or {}).to_df()
+        except Exception as e:
+            logger.error("Cypher query failed: %s", e)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Query: %s", query)
+                logger.debug("Parameters: %s", parameters)
+            return pd.DataFrame()
+    
+    def iter_query(self, query: str, parameters: Dict = None) -> Iterator[Dict]:
+        """Execute a Cypher query and yield records as they arrive
         
-        RETURN c.name AS customer_name,
-               c.email AS email,
-               c.segment AS segment,
-               c.ltv AS ltv,
-               SIZE(purchases) AS total_purchases,
-               SIZE(views) AS total_views,
-               purchases[..5] AS recent_purchases,
-               views[..5] AS recent_views
+        Uses its own session, since the caller may stop part way through;
+        use itertools.islice for top-k reads without materialising the rest.
         """
+        if self.mock_mode or not self.driver:
+            logger.debug("Running in mock mode - returning empty result")
+            return
         
-        result = self.run_query(query, {'customer_id': customer_id})
+        try:
+            with self._session() as session:
+                for record in session.run(self._timed(query), parameters or {}):
+                    yield record.data()
+        except Exception as e:
+            logger.error("Cypher query failed: %s", e)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Query: %s", query)
+                logger.debug("Parameters: %s", parameters)
+    
+    def _run_cached(self, key: Tuple, query: str, parameters: Dict = None) -> List[Dict]:
+        """Run a query through the shared TTL cache; callers get their own copy"""
+        cache = self._analytics_cache
+        now = time.monotonic()
+        with self._analytics_cache_lock:
+            entry = cache.get(key)
+            if entry is not None and now - entry[0] < self.ANALYTICS_CACHE_TTL:
+                return copy.deepcopy(entry[1])
+        
+        result = self.run_query(query, parameters)
+        # Empty means failed or mock mode - leave it to the caller's fallback
+        if result:
+            with self._analytics_cache_lock:
+                cache.pop(key, None)
+                while len(cache) >= self.ANALYTICS_CACHE_SIZE:
+                    del cache[next(iter(cache))]
+                cache[key] = (now, result)
+            result = copy.deepcopy(result)
+        return result
+    
+    def get_customer_360_view(self, customer_id: str) -> Dict:
+        """Get complete 360-degree view of a customer"""
+        result = self.run_query(_Q_CUSTOMER_360, {'customer_id': customer_id})
         return result[0] if result else {}
     
-    def get_customer_recommendations(self, customer_id: str, limit: int = 10) -> List[Dict]:
-        """Get product recommendations based on similar customers"""
-        
-        query = """
-        // Find customers with similar purchase patterns
-        MATCH (target:Customer {customer_id: $customer_id})-[:PURCHASED]->(p:Product)
-        WITH target, COLLECT(p) AS targetProducts
-        
-        MATCH (other:Customer)-[:PURCHASED]->(p:Product)
-        WHERE p IN targetProducts AND other <> target
-        WITH target, other, COUNT(DISTINCT p) AS commonProducts
-        WHERE commonProducts >= 2
+    def get_customer_360_view_batch(self, customer_ids: List[str]) -> Dict[str, Dict]:
+        """Get 360-degree views for many customers in a single query
         
-        // Find products purchased by similar customers but not by target
-        MATCH (other)-[:PURCHASED]->(rec:Product)
-        WHERE NOT (target)-[:PURCHASED]->(rec)
-        
-        RETURN rec.name AS product_name,
-               rec.category AS category,
-               rec.brand AS brand,
-               rec.price AS price,
-               COUNT(DISTINCT other) AS recommended_by_customers,
-               AVG(commonProducts) AS similarity_score
-        ORDER BY recommended_by_customers DESC, similarity_score DESC
-        LIMIT $limit
+        Customers that are not found map to an empty dict, as in get_customer_360_view.
         """
-        
-        return self.run_query(query, {'customer_id': customer_id, 'limit': limit})
+        views = {customer_id: {} for customer_id in customer_ids}
+        for row in self.run_query(_Q_CUSTOMER_360_BATCH, {'customer_ids': list(customer_ids)}):
+            views[row.pop('cid')] = row
+        return views
+    
+    def get_customer_recommendations(self, customer_id: str, limit: int = 10) -> List[Dict]:
+        """Get product recommendations based on similar customers"""
+        return self.run_query(_Q_RECOMMENDATIONS, {'customer_id': customer_id, 'limit': limit})
     
     def get_top_customers_by_segment(self, segment: str = None, limit: int = 20) -> List[Dict]:
         """Get top customers by total spending, optionally filtered by segment"""
-        
-        where_clause = "WHERE c.segment = $segment" if segment else ""
-        
-        query = f"""
-        MATCH (c:Customer)-[p:PURCHASED]->(product:Product)
-        {where_clause}
-        
-        WITH c, 
-             COUNT(p) AS total_purchases,
-             SUM(p.amount) AS total_spent,
-             COLLECT(DISTINCT product.category) AS categories
-        
-        RETURN c.customer_id AS customer_id,
-               c.name AS customer_name,
-               c.segment AS segment,
-               c.ltv AS ltv,
-               total_purchases,
-               ROUND(total_spent, 2) AS total_spent,
-               SIZE(categories) AS unique_categories,
-               categories[..3] AS top_categories
-        ORDER BY total_spent DESC
-        LIMIT $limit
-        """
-        
-        params = {'limit': limit}
-        if segment:
-            params['segment'] = segment
-        
-        return self.run_query(query, params)
+        return self.run_query(_Q_TOP_CUSTOMERS, {'segment': segment or None, 'limit': limit})
     
     def get_popular_products(self, category: str = None, limit: int = 20) -> List[Dict]:
         """Get most popular products by purchase count"""
@@ -169,117 +586,19 @@ class Customer360Queries:
         if self.mock_mode or not self.driver:
             return self._get_mock_popular_products(category, limit)
         
-        where_clause = "WHERE p.category = $category" if category else ""
-        
-        query = f"""
-        MATCH (c:Customer)-[purchased:PURCHASED]->(p:Product)
-        {where_clause}
-        
-        WITH p, 
-             COUNT(purchased) AS purchase_count,
-             COUNT(DISTINCT c) AS unique_customers,
-             SUM(purchased.amount) AS total_revenue,
-             AVG(purchased.amount) AS avg_purchase_amount
-        
-        RETURN p.name AS product_name,
-               p.category AS category,
-               p.brand AS brand,
-               p.price AS list_price,
-               purchase_count,
-               unique_customers,
-               ROUND(total_revenue, 2) AS total_revenue,
-               ROUND(avg_purchase_amount, 2) AS avg_purchase_amount
-        ORDER BY purchase_count DESC
-        LIMIT $limit
-        """
-        
-        params = {'limit': limit}
-        if category:
-            params['category'] = category
-        
-        result = self.run_query(query, params)
+        result = self._run_cached(
+            ('popular_products', category or None, limit),
+            _Q_POPULAR_PRODUCTS, {'category': category or None, 'limit': limit}
+        )
         return result if result else self._get_mock_popular_products(category, limit)
     
-    def get_customer_journey(self, customer_id: str) -> List[Dict]:
-        """Get chronological customer journey (views and purchases)"""
-        
-        query = """
-        MATCH (c:Customer {customer_id: $customer_id})
-        
-        // Get all purchases
-        OPTIONAL MATCH (c)-[p:PURCHASED]->(purchased:Product)
-        WITH c, COLLECT({
-            type: 'PURCHASE',
-            product_name: purchased.name,
-            category: purchased.category,
-            amount: p.amount,
-            timestamp: p.timestamp,
-            channel: p.channel
-        }) AS purchases
-        
-        // Get all views
-        OPTIONAL MATCH (c)-[v:VIEWED]->(viewed:Product)
-        WITH c, purchases, COLLECT({
-            type: 'VIEW',
-            product_name: viewed.name,
-            category: viewed.category,
-            duration: v.duration,
-            timestamp: v.timestamp,
-            device: v.device
-        }) AS views
-        
-        // Combine and sort by timestamp
-        WITH purchases + views AS all_events
-        UNWIND all_events AS event
-        
-        RETURN event.type AS event_type,
-               event.product_name AS product_name,
-               event.category AS category,
-               event.amount AS amount,
-               event.duration AS duration,
-               event.timestamp AS timestamp,
-               event.channel AS channel,
-               event.device AS device
-        ORDER BY event.timestamp DESC
-        LIMIT 50
-        """
-        
-        return self.run_query(query, {'customer_id': customer_id})
+    def get_customer_journey(self, customer_id: str, limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Get chronological customer journey (views and purchases), newest first"""
+        return self.run_query(_Q_JOURNEY, {'customer_id': customer_id, 'limit': limit, 'offset': offset})
     
     def get_category_affinity(self, limit: int = 10) -> List[Dict]:
         """Find product categories frequently bought together"""
-        
-        query = """
-        MATCH (c:Customer)-[:PURCHASED]->(p1:Product)
-        MATCH (c)-[:PURCHASED]->(p2:Product)
-        WHERE p1.category < p2.category  // Avoid duplicates and self-matches
-        
-        WITH p1.category AS category1, 
-             p2.category AS category2, 
-             COUNT(DISTINCT c) AS customers_buying_both
-        
-        MATCH (:Customer)-[:PURCHASED]->(:Product {category: category1})
-        WITH category1, category2, customers_buying_both, COUNT(DISTINCT c) AS total_category1_customers
-        
-        MATCH (:Customer)-[:PURCHASED]->(:Product {category: category2})
-        WITH category1, category2, customers_buying_both, total_category1_customers, 
-             COUNT(DISTINCT c) AS total_category2_customers
-        
-        // Calculate affinity metrics
-        WITH category1, category2, customers_buying_both,
-             total_category1_customers, total_category2_customers,
-             ROUND(toFloat(customers_buying_both) / total_category1_customers, 3) AS affinity_1_to_2,
-             ROUND(toFloat(customers_buying_both) / total_category2_customers, 3) AS affinity_2_to_1
-        
-        RETURN category1,
-               category2,
-               customers_buying_both,
-               ROUND((affinity_1_to_2 + affinity_2_to_1) / 2, 3) AS avg_affinity
-        ORDER BY avg_affinity DESC
-        LIMIT $limit
-        """
-        
-        return self.run_query(query, {'limit': limit})
+        return self._run_cached(('category_affinity', limit), _Q_CATEGORY_AFFINITY, {'limit': limit})
     
     def get_segment_analysis(self) -> List[Dict]:
         """Analyze customer segments behavior"""
@@ -287,135 +606,129 @@ class Customer360Queries:
         if self.mock_mode or not self.driver:
             return self._get_mock_segment_analysis()
         
-        query = """
-        MATCH (c:Customer)
-        OPTIONAL MATCH (c)-[p:PURCHASED]->(product:Product)
-        
-        WITH c.segment AS segment,
-             COUNT(DISTINCT c) AS total_customers,
-             COUNT(p) AS total_purchases,
-             SUM(p.amount) AS total_revenue,
-             AVG(c.ltv) AS avg_ltv,
-             COLLECT(DISTINCT product.category) AS categories
-        
-        RETURN segment,
-               total_customers,
-               total_purchases,
-               ROUND(total_revenue, 2) AS total_revenue,
-               ROUND(toFloat(total_purchases) / total_customers, 1) AS avg_purchases_per_customer,
-               ROUND(total_revenue / total_customers, 2) AS avg_revenue_per_customer,
-               ROUND(avg_ltv, 2) AS avg_ltv,
-               SIZE(categories) AS unique_categories_purchased
-        ORDER BY total_revenue DESC
-        """
-        
-        result = self.run_query(query)
+        result = self._run_cached(('segment_analysis',), _Q_SEGMENT_ANALYSIS)
         return result if result else self._get_mock_segment_analysis()
     
-    def search_customers(self, search_term: str, limit: int = 20) -> List[Dict]:
+    def search_customers(self, search_term: str, limit: int = 20, offset: int = 0) -> List[Dict]:
         """Search customers by name or email"""
         
-        query = """
-        MATCH (c:Customer)
-        WHERE toLower(c.name) CONTAINS toLower($search_term) 
-           OR toLower(c.email) CONTAINS toLower($search_term)
-        
-        OPTIONAL MATCH (c)-[p:PURCHASED]->(product:Product)
-        WITH c, COUNT(p) AS total_purchases, SUM(p.amount) AS total_spent
-        
-        RETURN c.customer_id AS customer_id,
-               c.name AS customer_name,
-               c.email AS email,
-               c.segment AS segment,
-               c.ltv AS ltv,
-               total_purchases,
-               ROUND(total_spent, 2) AS total_spent
-        ORDER BY total_spent DESC
-        LIMIT $limit
-        """
-        
         if self.mock_mode or not self.driver:
-            return self._get_mock_customer_search(search_term, limit)
+            return self._get_mock_customer_search(search_term, limit, offset)
         
-        result = self.run_query(query, {'search_term': search_term, 'limit': limit})
-        return result if result else self._get_mock_customer_search(search_term, limit)
+        params = {'term_lc': search_term.lower(), 'limit': limit, 'offset': offset}
+        result = self.run_query(_Q_SEARCH, params)
+        return result if result else self._get_mock_customer_search(search_term, limit, offset)
     
     # Mock data methods for fallback when PuppyGraph is not available
     def _get_mock_segment_analysis(self) -> List[Dict]:
         """Mock segment analysis data"""
-        return [
-            {
-                'segment': 'Premium',
-                'total_customers': 150000,
-                'total_purchases': 750000,
-                'total_revenue': 125000000.50,
-                'avg_purchases_per_customer': 5.0,
-                'avg_revenue_per_customer': 833.33,
-                'avg_ltv': 5200.50,
-                'unique_categories_purchased': 8
-            },
-            {
-                'segment': 'Regular',
-                'total_customers': 450000,
-                'total_purchases': 1350000,
-                'total_revenue': 189000000.75,
-                'avg_purchases_per_customer': 3.0,
-                'avg_revenue_per_customer': 420.00,
-                'avg_ltv': 2800.75,
-                'unique_categories_purchased': 6
-            },
-            {
-                'segment': 'Basic',
-                'total_customers': 400000,
-                'total_purchases': 800000,
-                'total_revenue': 96000000.25,
-                'avg_purchases_per_customer': 2.0,
-                'avg_revenue_per_customer': 240.00,
-                'avg_ltv': 1200.25,
-                'unique_categories_purchased': 4
-            }
-        ]
-    
-    def _get_mock_customer_search(self, search_term: str, limit: int) -> List[Dict]:
+        return [dict(segment) for segment in _MOCK_SEGMENTS]
+    
+    def _get_mock_customer_search(self, search_term: str, limit: int, offset: int = 0) -> List[Dict]:
         """Mock customer search results"""
-        all_customers = [
-            {'customer_id': '0002d9cc-ce1e-4ed2-b169-7d1a778e7a72', 'customer_name': 'Michael Myers', 'email': 'michael.myers@example.org', 'segment': 'Premium', 'ltv': 5200.50, 'total_purchases': 15, 'total_spent': 8750.25},
-            {'customer_id': '00038af4-afee-4e3a-8ba2-9b31d77eff7f', 'customer_name': 'John Mcconnell', 'email': 'john.mcconnell@example.com', 'segment': 'Regular', 'ltv': 2800.75, 'total_purchases': 8, 'total_spent': 3420.50},
-            {'customer_id': '00054351-cc20-43e4-a10e-9e6e39fc4311', 'customer_name': 'Sarah Duncan', 'email': 'sarah.duncan@example.net', 'segment': 'Premium', 'ltv': 6100.00, 'total_purchases': 18, 'total_spent': 12450.75},
-            {'customer_id': '0008ab35-aa33-40ca-bd85-64c3870e310f', 'customer_name': 'Michael Gardner', 'email': 'michael.gardner@gmail.com', 'segment': 'Regular', 'ltv': 3200.25, 'total_purchases': 10, 'total_spent': 4680.00},
-            {'customer_id': '0009a6c7-832e-4ab8-b803-a3046b06a9f9', 'customer_name': 'John Palmer', 'email': 'john.palmer@yahoo.com', 'segment': 'Basic', 'ltv': 1500.50, 'total_purchases': 5, 'total_spent': 1200.25}
-        ]
-        
-        # Filter based on search term
+        # Filter based on search term, stopping once the requested page is filled
         search_lower = search_term.lower()
-        filtered = []
-        for customer in all_customers:
-            if (search_lower in customer['customer_name'].lower() or 
-                search_lower in customer['email'].lower()):
-                filtered.append(customer)
+        matches = (
+            customer for customer, name_lc, email_lc in _MOCK_CUSTOMERS_LC
+            if search_lower in name_lc or search_lower in email_lc
+        )
         
-        return filtered[:limit]
+        return [dict(customer) for customer in itertools.islice(matches, offset, offset + limit)]
     
     def _get_mock_popular_products(self, category: str = None, limit: int = 20) -> List[Dict]:
         """Mock popular products data"""
-        all_products = [
-            {'product_name': 'iPhone 15 Pro Max', 'category': 'Electronics', 'brand': 'Apple', 'list_price': 1199.99, 'purchase_count': 8542, 'unique_customers': 7821, 'total_revenue': 10250000.58, 'avg_purchase_amount': 1201.25},
-            {'product_name': 'Premium Coffee Beans', 'category': 'Food', 'brand': 'Starbucks', 'list_price': 24.99, 'purchase_count': 6234, 'unique_customers': 4521, 'total_revenue': 155742.66, 'avg_purchase_amount': 24.99},
-            {'product_name': 'Wireless Headphones', 'category': 'Electronics', 'brand': 'Sony', 'list_price': 299.99, 'purchase_count': 5874, 'unique_customers': 5102, 'total_revenue': 1762000.26, 'avg_purchase_amount': 299.99},
-            {'product_name': 'Organic Cotton T-Shirt', 'category': 'Clothing', 'brand': 'Patagonia', 'list_price': 45.00, 'purchase_count': 4521, 'unique_customers': 3876, 'total_revenue': 203445.00, 'avg_purchase_amount': 45.00},
-            {'product_name': 'Smart Watch', 'category': 'Electronics', 'brand': 'Samsung', 'list_price': 399.99, 'purchase_count': 4102, 'unique_customers': 3654, 'total_revenue': 1640000.98, 'avg_purchase_amount': 399.99},
-            {'product_name': 'Yoga Mat', 'category': 'Sports', 'brand': 'Lululemon', 'list_price': 78.00, 'purchase_count': 3845, 'unique_customers': 3201, 'total_revenue': 299910.00, 'avg_purchase_amount': 78.00},
-            {'product_name': 'Running Shoes', 'category': 'Sports', 'brand': 'Nike', 'list_price': 149.99, 'purchase_count': 3654, 'unique_customers': 3298, 'total_revenue': 548000.46, 'avg_purchase_amount': 149.99},
-            {'product_name': 'Skincare Set', 'category': 'Beauty', 'brand': 'Glossier', 'list_price': 89.00, 'purchase_count': 3102, 'unique_customers': 2876, 'total_revenue': 276078.00, 'avg_purchase_amount': 89.00}
-        ]
-        
-        # Filter by category if specified
+        # Filter by category if specified, stopping once limit products are found
         if category:
-            filtered_products = [p for p in all_products if p['category'].lower() == category.lower()]
+            category_lower = category.lower()
+            filtered_products = (p for p in _MOCK_PRODUCTS if p['category'].lower() == category_lower)
         else:
-            filtered_products = all_products
+            filtered_products = iter(_MOCK_PRODUCTS)
+        
+        return [dict(product) for product in itertools.islice(filtered_products, limit)]
+
+
+_queries: Optional[Customer360Queries] = None
+_queries_lock = threading.Lock()
+
+
+def get_queries() -> Customer360Queries:
+    """Shared Customer360Queries, so callers reuse one driver and its Bolt pool
+    
+    Safe to use from several request threads - each query runs on its own
+    session borrowed from the shared pool. An instance stuck in mock mode is
+    rebuilt once the connect cool-down has passed, so the process reconnects
+    when PuppyGraph comes back.
+    """
+    global _queries
+    with _queries_lock:
+        if _queries is None or (_queries.mock_mode and time.monotonic() >= _CB['open_until']):
+            # A mock-mode instance holds no driver, so there is nothing to close
+            _queries = Customer360Queries()
+        return _queries
+
+
+class AsyncCustomer360Queries:
+    """Async Customer 360 queries, so independent round trips can overlap"""
+    
+    def __init__(self):
+        """Create an async Neo4j driver for PuppyGraph; it connects on first query"""
+        self.host = _CFG.host
+        self.port = _CFG.port
+        self.username = _CFG.username
+        self.password = _CFG.password
+        self.database = _CFG.database
+        self.query_timeout = _CFG.query_timeout
         
-        return filtered_products[:limit]
+        uri = f"bolt://{self.host}:{self.port}"
+        self.driver = AsyncGraphDatabase.driver(
+            uri,
+            auth=(self.username, self.password),
+            max_connection_pool_size=50,
+            connection_acquisition_timeout=30,
+            max_connection_lifetime=3600,
+            keep_alive=True
+        )
+    
+    async def close(self):
+        """Close the database connection"""
+        await self.driver.close()
+    
+    async def run_query(self, query: str, parameters: Dict = None) -> List[Dict]:
+        """Execute a Cypher query and return results"""
+        try:
+            # One session per call - async sessions can't be shared by concurrent tasks
+            async with self.driver.session(database=self.database, default_access_mode=READ_ACCESS) as session:
+                result = await session.run(Query(query, timeout=self.query_timeout), parameters or {})
+                return await result.data()
+        except Exception as e:
+            logger.error("Cypher query failed: %s", e)
+            return []
+    
+    async def get_customer_360_view(self, customer_id: str) -> Dict:
+        """Get complete 360-degree view of a customer"""
+        result = await self.run_query(_Q_CUSTOMER_360, {'customer_id': customer_id})
+        return result[0] if result else {}
+    
+    async def get_customer_recommendations(self, customer_id: str, limit: int = 10) -> List[Dict]:
+        """Get product recommendations based on similar customers"""
+        return await self.run_query(_Q_RECOMMENDATIONS, {'customer_id': customer_id, 'limit': limit})
+    
+    async def get_customer_journey(self, customer_id: str, limit: int = 50, offset: int = 0) -> List[Dict]:
+        """Get chronological customer journey (views and purchases), newest first"""
+        return await self.run_query(_Q_JOURNEY, {'customer_id': customer_id, 'limit': limit, 'offset': offset})
+    
+    async def get_customer_dashboard(self, customer_id: str) -> Dict:
+        """Fetch profile, journey and recommendations for a customer concurrently"""
+        profile, journey, recommendations = await asyncio.gather(
+            self.get_customer_360_view(customer_id),
+            self.get_customer_journey(customer_id),
+            self.get_customer_recommendations(customer_id)
+        )
+        return {
+            'profile': profile,
+            'journey': journey,
+            'recommendations': recommendations
+        }
 
 
 def main():
@@ -448,7 +761,7 @@ def main():
         print("\n Query tests completed successfully!")
         
     except Exception as e:
-        logger.error(f"Query test failed: {e}")
+        logger.error("Query test failed: %s", e)
     finally:
         queries.close()
 